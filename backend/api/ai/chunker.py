@@ -0,0 +1,127 @@
+import os
+import re
+import sys
+from typing import Iterator, List
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.markdown import split_markdown_blocks
+from utils.tokens import CHARS_PER_TOKEN, count_tokens, count_tokens_batch
+
+load_dotenv()
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 300))
+
+# Split after sentence punctuation, keeping the whitespace with the next sentence
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])(?=\s)")
+
+# Tokens taken by the blank line joining the heading and parts of a chunk
+SEPARATOR_TOKENS = 1
+
+# Blocks that carry no readable book content
+SKIPPED_KINDS = ("frontmatter", "mdx", "blank")
+
+def _split_oversized(text: str, kind: str, max_tokens: int) -> List[str]:
+    """
+    Split a single block that exceeds max_tokens into pieces that fit:
+    code by lines, prose by sentences, falling back to a hard character cut
+    """
+    units = text.splitlines(keepends=True) if kind == "code" else SENTENCE_BOUNDARY_RE.split(text)
+    pieces, current, current_tokens = [], [], 0
+    for unit, tokens in zip(units, count_tokens_batch(units)):
+        if tokens > max_tokens:
+            max_chars = max_tokens * CHARS_PER_TOKEN
+            units_split = [unit[i:i + max_chars] for i in range(0, len(unit), max_chars)]
+        else:
+            units_split = [unit]
+        for piece in units_split:
+            piece_tokens = tokens if len(units_split) == 1 else count_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                pieces.append("".join(current).strip())
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        pieces.append("".join(current).strip())
+    return [piece for piece in pieces if piece]
+
+def chunk_markdown(text: str, chapter_id: str, max_tokens: int = CHUNK_MAX_TOKENS) -> Iterator[dict]:
+    """
+    Split a Markdown chapter into retrieval chunks of at most max_tokens.
+
+    Chunks never cross a heading, code fences are kept whole unless they
+    alone exceed the budget, and each chunk starts with its section heading
+    so it reads on its own. Every chunk carries the chapter id, its heading
+    path and the character offsets of its content in the source.
+    """
+    blocks = split_markdown_blocks(text)
+    # Tokenize every block in one batch rather than block by block
+    block_tokens = count_tokens_batch([block.text.strip() for block in blocks])
+
+    heading_path: List[str] = []
+    heading_line = ""
+    heading_tokens = 0
+    parts: List[str] = []
+    part_tokens = 0
+    start = end = 0
+    chunk_index = 0
+    offset = 0
+
+    def make_chunk():
+        body = "\n\n".join(parts)
+        return {
+            "text": f"{heading_line}\n\n{body}" if heading_line else body,
+            "chapter_id": chapter_id,
+            "chunk_index": chunk_index,
+            "heading_path": list(heading_path),
+            "start_offset": start,
+            "end_offset": end,
+            "token_count": heading_tokens + part_tokens,
+        }
+
+    for block, tokens in zip(blocks, block_tokens):
+        block_start = offset
+        offset += len(block.text)
+        if block.kind in SKIPPED_KINDS:
+            continue
+
+        if block.kind == "heading":
+            if parts:
+                yield make_chunk()
+                chunk_index += 1
+                parts, part_tokens = [], 0
+            level = block.prefix.count("#")
+            heading_path = heading_path[:level - 1] + [block.body.strip()]
+            heading_line = block.text.strip()
+            heading_tokens = count_tokens(heading_line) + SEPARATOR_TOKENS
+            continue
+
+        budget = max(max_tokens - heading_tokens, 1)
+        content = block.text.strip()
+        content_start = block_start + block.text.index(content[:1]) if content else block_start
+        pieces = [content] if tokens <= budget else _split_oversized(content, block.kind, budget)
+        piece_tokens = [tokens] if len(pieces) == 1 else count_tokens_batch(pieces)
+
+        cursor = 0
+        for piece, piece_token_count in zip(pieces, piece_tokens):
+            # Locate the piece in the block; splitting only drops whitespace
+            found = content.find(piece[:40], cursor)
+            piece_start = content_start + (found if found >= 0 else cursor)
+            cursor = (found if found >= 0 else cursor) + len(piece)
+
+            if parts and part_tokens + SEPARATOR_TOKENS + piece_token_count > budget:
+                yield make_chunk()
+                chunk_index += 1
+                parts, part_tokens = [], 0
+            if parts:
+                part_tokens += SEPARATOR_TOKENS
+            else:
+                start = piece_start
+            parts.append(piece)
+            part_tokens += piece_token_count
+            end = content_start + min(cursor, len(content))
+
+    if parts:
+        yield make_chunk()
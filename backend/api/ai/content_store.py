@@ -0,0 +1,99 @@
+import os
+import sys
+from typing import Dict, List
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert, select
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.vector_store import SearchResult
+from database import AsyncSessionLocal
+from database.models import ChunkContent
+from utils.cache import LRUCache
+from utils.metrics import register_cache
+
+load_dotenv()
+
+# "payload" keeps chunk text in the vector store payloads; "database" moves
+# it to the chunk_contents table, leaving only metadata next to the vectors
+CONTENT_STORE = os.getenv("CONTENT_STORE", "payload").lower()
+CONTENT_CACHE_MAX_ENTRIES = int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", 5000))
+
+# Texts of recently retrieved chunks; chunk ids are content-addressed, so
+# a cached text never goes stale
+content_cache = LRUCache(max_entries=CONTENT_CACHE_MAX_ENTRIES)
+register_cache("chunk_content", content_cache.stats)
+
+def uses_content_store() -> bool:
+    return CONTENT_STORE == "database"
+
+def strip_text(payload: dict) -> dict:
+    """
+    The payload to store next to the vector
+    """
+    if not uses_content_store():
+        return payload
+    return {key: value for key, value in payload.items() if key != "text"}
+
+async def store_texts(records: List[dict]):
+    """
+    Save the text of point records ({"id", "payload"}), replacing earlier versions
+    """
+    if not records:
+        return
+    ids = [record["id"] for record in records]
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ChunkContent).where(ChunkContent.id.in_(ids)))
+        await db.execute(insert(ChunkContent), [
+            {
+                "id": record["id"],
+                "chapter_id": record["payload"].get("chapter_id"),
+                "content_hash": record["payload"].get("content_hash"),
+                "text": record["payload"].get("text", "")
+            }
+            for record in records
+        ])
+        await db.commit()
+
+async def delete_texts(point_ids: List[str]):
+    if not point_ids:
+        return
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ChunkContent).where(ChunkContent.id.in_(list(point_ids))))
+        await db.commit()
+    for point_id in point_ids:
+        content_cache.pop(point_id)
+
+async def load_texts(point_ids: List[str]) -> Dict[str, str]:
+    """
+    Return {point_id: text}, reading only cache misses from the database
+    """
+    texts, missing = {}, []
+    for point_id in point_ids:
+        text = content_cache.get(point_id)
+        if text is None:
+            missing.append(point_id)
+        else:
+            texts[point_id] = text
+    if missing:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(ChunkContent.id, ChunkContent.text).where(ChunkContent.id.in_(missing)))
+            for point_id, text in result.all():
+                content_cache.set(point_id, text)
+                texts[point_id] = text
+    return texts
+
+async def hydrate_texts(results: List[SearchResult]) -> List[SearchResult]:
+    """
+    Fill in the text of search results whose payloads don't carry it
+    """
+    missing = [result.id for result in results if "text" not in result.payload]
+    if not missing:
+        return results
+    texts = await load_texts(missing)
+    return [
+        result if "text" in result.payload
+        else result._replace(payload={**result.payload, "text": texts.get(result.id, "")})
+        for result in results
+    ]
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.openai_service import get_embeddings_async
+
+load_dotenv()
+
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 64))
+EMBEDDING_BATCH_MAX_DELAY_MS = float(os.getenv("EMBEDDING_BATCH_MAX_DELAY_MS", 5))
+
+class EmbeddingBatcher:
+    """
+    Micro-batch concurrent embedding requests into multi-input API calls.
+
+    Callers await ``embed(text)``; texts are queued until the batch holds
+    ``max_batch_size`` inputs or the oldest has waited ``max_delay_ms``,
+    then embedded with one request and the results fanned back out.
+    """
+
+    def __init__(self, model: str = "text-embedding-ada-002",
+                 max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+                 max_delay_ms: float = EMBEDDING_BATCH_MAX_DELAY_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._pending = []  # (text, future, enqueued_at)
+        self._timer = None
+        self._flushes = set()  # Strong references so flush tasks aren't garbage collected
+
+        # Metrics
+        self.batches = 0
+        self.inputs = 0
+        self.max_batch_seen = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+        self.errors = 0
+
+    async def embed(self, text: str) -> list:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+
+        return await future
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self._flush(self._take_batch())
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self._flush(self._take_batch()))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _take_batch(self):
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending and self._timer is None:
+            # Leftovers start a new batch window
+            self._timer = asyncio.create_task(self._flush_after_delay())
+        return batch
+
+    async def _flush(self, batch):
+        if not batch:
+            return
+        started = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            delay = started - enqueued_at
+            self.total_queue_delay += delay
+            self.max_queue_delay = max(self.max_queue_delay, delay)
+
+        # Identical texts in the same window share one input
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+        self.batches += 1
+        self.inputs += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(unique_texts))
+
+        try:
+            embeddings = await get_embeddings_async(unique_texts, model=self.model)
+        except Exception as e:
+            self.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, embeddings))
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "inputs": self.inputs,
+            "avg_batch_size": self.inputs / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "avg_queue_delay_ms": 1000 * self.total_queue_delay / self.inputs if self.inputs else 0.0,
+            "max_queue_delay_ms": 1000 * self.max_queue_delay,
+            "errors": self.errors,
+            "pending": len(self._pending),
+        }
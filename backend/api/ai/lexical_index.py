@@ -0,0 +1,146 @@
+import math
+import os
+import re
+import sys
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.vector_store import SearchResult
+
+load_dotenv()
+
+BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+BM25_B = float(os.getenv("BM25_B", 0.75))
+# Fraction of a query's words a chunk must contain to be returned, so a
+# single common word ("learning") doesn't pull in unrelated chunks
+BM25_MIN_TERM_MATCH = float(os.getenv("BM25_MIN_TERM_MATCH", 0.5))
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Common words that match nearly every chunk and only add noise to scores
+STOPWORDS = frozenset("""
+a about an and are as at be but by can do does for from has have how i if in into is it its
+me my of on or our so that the their then there these this to was what when where which who
+why will with you your
+""".split())
+
+def index_terms(text: str) -> List[str]:
+    """
+    Lowercased words without stopwords, plus adjacent word pairs so exact
+    phrases ("predictive analytics") outrank chunks with the words apart.
+    Single characters (list numbers, initials) only count within pairs.
+    """
+    words = [word for word in TOKEN_RE.findall(text.lower()) if word not in STOPWORDS]
+    pairs = [f"{first} {second}" for first, second in zip(words, words[1:])]
+    return [word for word in words if len(word) > 1] + pairs
+
+class BM25Index:
+    """
+    In-memory inverted index ranking chunks with Okapi BM25.
+
+    Postings are stored per term as NumPy arrays of document rows and term
+    frequencies, so scoring a query touches only the documents containing
+    its terms. The index is immutable; rebuild it when the chunks change.
+    """
+
+    def __init__(self, records: List[dict], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.ids = [str(record["id"]) for record in records]
+        self.payloads = [record["payload"] for record in records]
+
+        postings: Dict[str, list] = {}
+        lengths = []
+        for row, payload in enumerate(self.payloads):
+            terms = index_terms(payload.get("text", ""))
+            lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                postings.setdefault(term, []).append((row, frequency))
+
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        self.average_length = float(self.lengths.mean()) if lengths else 0.0
+        self.postings = {}
+        for term, entries in postings.items():
+            rows, frequencies = zip(*entries)
+            self.postings[term] = (
+                np.asarray(rows, dtype=np.int32),
+                np.asarray(frequencies, dtype=np.float32),
+                self._idf(len(entries))
+            )
+
+    def _idf(self, document_frequency: int) -> float:
+        count = len(self.ids)
+        return math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: str, limit: int = 5, min_term_match: float = BM25_MIN_TERM_MATCH) -> List[SearchResult]:
+        if not self.ids or limit <= 0:
+            return []
+        terms = set(index_terms(query))
+        words = [term for term in terms if " " not in term]
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        word_matches = np.zeros(len(self.ids), dtype=np.int32)
+        matched = False
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            rows, frequencies, idf = posting
+            length_norm = 1 - self.b + self.b * self.lengths[rows] / (self.average_length or 1)
+            scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + self.k1 * length_norm)
+            if " " not in term:
+                word_matches[rows] += 1
+            matched = True
+        if not matched:
+            return []
+        scores[word_matches < min_term_match * len(words)] = 0
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[scores[top] > 0]
+        return [SearchResult(self.ids[row], float(scores[row]), self.payloads[row]) for row in top]
+
+    def stats(self) -> dict:
+        return {"documents": len(self.ids), "terms": len(self.postings), "average_length": self.average_length}
+
+def reciprocal_rank_fusion(result_lists: List[List[SearchResult]], limit: int = 5,
+                           k: int = 60) -> List[SearchResult]:
+    """
+    Merge rankings by summing 1 / (k + rank) per chunk. Only ranks matter,
+    so BM25 and cosine scores needn't be on comparable scales.
+    """
+    fused: Dict[str, float] = {}
+    payloads: Dict[str, dict] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            fused[result.id] = fused.get(result.id, 0.0) + 1 / (k + rank)
+            # Prefer payloads that carry the chunk text (see CONTENT_STORE)
+            if result.id not in payloads or "text" not in payloads[result.id]:
+                payloads[result.id] = result.payload
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [SearchResult(point_id, score, payloads[point_id]) for point_id, score in ranked]
+
+_index: Optional[BM25Index] = None
+
+def get_lexical_index() -> BM25Index:
+    """
+    Return the BM25 index over the book, built on first use from the same
+    chunks (and point ids) that ingestion writes to the vector store
+    """
+    global _index
+    if _index is None:
+        from ai.populate_qdrant import build_chunks
+        from utils.book import load_all_chapters
+        _index = BM25Index(build_chunks(load_all_chapters()))
+    return _index
+
+def get_lexical_index_stats() -> Optional[dict]:
+    return _index.stats() if _index is not None else None
@@ -0,0 +1,195 @@
+import json
+import math
+import os
+import sys
+from typing import List
+import numpy as np
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.quantization import VECTOR_QUANTIZATION, VECTOR_RESCORE_OVERSAMPLING, get_quantizer_class, QUANTIZERS
+from ai.vector_store import VectorStore, SearchResult
+
+load_dotenv()
+
+LOCAL_VECTOR_STORE_PATH = os.getenv(
+    "LOCAL_VECTOR_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "vector_store")
+)
+
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.json"
+CODES_FILE = "codes.bin"
+QUANTIZER_FILE = "quantizer.npz"
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k highest scores, best first. argpartition finds them
+    in O(n); only those k get sorted.
+    """
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index for single-node deployments, development and tests.
+
+    Vectors are stored L2-normalized in a float32 matrix memory-mapped from
+    disk, so cosine similarity is a single matrix-vector product and several
+    worker processes share the same pages. Ids and payloads live in a JSON
+    index next to the matrix. Writes rewrite both files atomically.
+
+    With ``quantization`` ("scalar" or "product"), compact codes of the
+    vectors are also stored and held in memory. Searches scan the codes,
+    then rescore the best ``oversampling`` times as many candidates with
+    the float vectors, of which only those rows are read from disk.
+    """
+
+    def __init__(self, path: str = LOCAL_VECTOR_STORE_PATH, quantization: str = VECTOR_QUANTIZATION,
+                 oversampling: float = VECTOR_RESCORE_OVERSAMPLING):
+        self.path = path
+        self.quantizer_class = get_quantizer_class(quantization)
+        self.oversampling = oversampling
+        self.ids: List[str] = []
+        self.payloads: List[dict] = []
+        self.rows = {}
+        self.dim = 0
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.quantizer = None
+        self.codes = None
+        self._load()
+
+    def _load(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        self.ids = index["ids"]
+        self.payloads = index["payloads"]
+        self.dim = index["dim"]
+        self.rows = {point_id: row for row, point_id in enumerate(self.ids)}
+        if self.ids:
+            self.matrix = np.memmap(
+                os.path.join(self.path, VECTORS_FILE),
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.ids), self.dim)
+            )
+        else:
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+
+        self.quantizer, self.codes = None, None
+        kind = index.get("quantization")
+        if kind and self.ids:
+            with np.load(os.path.join(self.path, QUANTIZER_FILE)) as params:
+                self.quantizer = QUANTIZERS[kind].from_params(params)
+            self.codes = np.fromfile(
+                os.path.join(self.path, CODES_FILE), dtype=self.quantizer.code_dtype
+            ).reshape(self.quantizer.codes_shape(len(self.ids)))
+
+    def _save(self, matrix: np.ndarray):
+        """
+        Persist the index, replacing the previous files atomically
+        """
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        index_path = os.path.join(self.path, INDEX_FILE)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        matrix.tofile(vectors_path + ".tmp")
+
+        # Codes are refitted on every write; ingestion writes in large batches
+        kind = None
+        if self.quantizer_class is not None and len(matrix):
+            kind = self.quantizer_class.kind
+            quantizer = self.quantizer_class.fit(matrix)
+            quantizer.encode(matrix).tofile(os.path.join(self.path, CODES_FILE + ".tmp"))
+            with open(os.path.join(self.path, QUANTIZER_FILE + ".tmp"), "wb") as f:
+                np.savez(f, **quantizer.params())
+
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "quantization": kind, "ids": self.ids, "payloads": self.payloads}, f)
+        os.replace(vectors_path + ".tmp", vectors_path)
+        if kind:
+            os.replace(os.path.join(self.path, CODES_FILE + ".tmp"), os.path.join(self.path, CODES_FILE))
+            os.replace(os.path.join(self.path, QUANTIZER_FILE + ".tmp"), os.path.join(self.path, QUANTIZER_FILE))
+        os.replace(index_path + ".tmp", index_path)
+        self._load()
+
+    async def create_collection(self):
+        os.makedirs(self.path, exist_ok=True)
+
+    async def search(self, query_embedding, limit=5, score_threshold=None):
+        if not self.ids or limit <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        if self.codes is not None:
+            approximate = self.quantizer.scores(self.codes, query)
+            # Sorted rows read the memory-mapped vectors front to back
+            candidates = np.sort(_top(approximate, math.ceil(limit * self.oversampling)))
+            exact = np.asarray(self.matrix[candidates]) @ query
+            best = _top(exact, limit)
+            top, top_scores = candidates[best], exact[best]
+        else:
+            scores = self.matrix @ query
+            top = _top(scores, limit)
+            top_scores = scores[top]
+        if score_threshold is not None:
+            keep = top_scores >= score_threshold
+            top, top_scores = top[keep], top_scores[keep]
+        return [SearchResult(self.ids[row], float(score), self.payloads[row]) for row, score in zip(top, top_scores)]
+
+    async def upsert(self, points):
+        if not points:
+            return
+        vectors = _normalize_rows(np.asarray([point["vector"] for point in points], dtype=np.float32))
+        if not self.dim:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+        # A repeated id in one batch is one point; the last copy wins
+        latest = {}
+        for point, vector in zip(points, vectors):
+            latest[str(point["id"])] = (point, vector)
+
+        matrix = np.array(self.matrix, dtype=np.float32).reshape(len(self.ids), self.dim)
+        new_rows = []
+        for point_id, (point, vector) in latest.items():
+            if point_id in self.rows:
+                matrix[self.rows[point_id]] = vector
+                self.payloads[self.rows[point_id]] = point["payload"]
+            else:
+                self.rows[point_id] = len(self.ids)
+                self.ids.append(point_id)
+                self.payloads.append(point["payload"])
+                new_rows.append(vector)
+        if new_rows:
+            matrix = np.vstack([matrix, np.asarray(new_rows, dtype=np.float32)])
+        self._save(matrix)
+
+    async def delete(self, point_ids):
+        doomed = {str(point_id) for point_id in point_ids}
+        keep = [row for row, point_id in enumerate(self.ids) if point_id not in doomed]
+        if len(keep) == len(self.ids):
+            return
+        matrix = np.asarray(self.matrix)[keep]
+        self.ids = [self.ids[row] for row in keep]
+        self.payloads = [self.payloads[row] for row in keep]
+        self._save(matrix)
+
+    async def get_indexed_hashes(self):
+        return {point_id: payload.get("content_hash") for point_id, payload in zip(self.ids, self.payloads)}
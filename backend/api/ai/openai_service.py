@@ -1,12 +1,75 @@
+import json
 import openai
 import os
+import sys
+import time
+import httpx
 from dotenv import load_dotenv
 
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.rate_limit import get_guard
+from utils.metrics import LLM_FIRST_TOKEN, LLM_REQUEST_DURATION, LLM_TOKENS, record_llm_usage
+from utils.tokens import estimate_tokens
+from utils.tracing import record_stage
+
 load_dotenv()
 
 # Set OpenAI API key
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# Async client configuration
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 60))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 5))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 100))
+CHAT_MAX_TOKENS = 1000
+
+# Prefix of the fallback text returned when an upstream call fails
+ERROR_RESPONSE_PREFIX = "Sorry, I encountered an error while processing your request"
+
+# Shared async HTTP client, created lazily on first use
+_async_client = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared pooled HTTP client used for async OpenAI calls
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            base_url=OPENAI_API_BASE,
+            headers={"Authorization": f"Bearer {openai.api_key}"},
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+            )
+        )
+    return _async_client
+
+def is_error_response(response: str) -> bool:
+    """
+    Whether a response is the fallback text for a failed upstream call
+    """
+    return response.startswith(ERROR_RESPONSE_PREFIX)
+
+async def close_async_client():
+    """
+    Close the shared async HTTP client (called on application shutdown)
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+def _observe_request(model: str, endpoint: str, started: float, outcome: str, stage: str = None):
+    duration = time.perf_counter() - started
+    LLM_REQUEST_DURATION.observe(duration, model=model, endpoint=endpoint, outcome=outcome)
+    if stage:
+        record_stage(stage, duration)
+
 def get_openai_response(system_prompt: str, user_prompt: str, model: str = "gpt-3.5-turbo") -> str:
     """
     Get a response from OpenAI's API
@@ -18,6 +81,7 @@ def get_openai_response(system_prompt: str, user_prompt: str, model: str = "gpt-
         # Return a mock response for development
         return f"This is a mock response to your question: '{user_prompt}'. In a production environment, this would be answered by an AI model."
     
+    started = time.perf_counter()
     try:
         response = openai.ChatCompletion.create(
             model=model,
@@ -28,10 +92,112 @@ def get_openai_response(system_prompt: str, user_prompt: str, model: str = "gpt-
             temperature=0.7,
             max_tokens=1000
         )
+        _observe_request(model, "chat", started, "success", stage="llm")
+        record_llm_usage(model, response.get("usage"))
         return response.choices[0].message.content.strip()
     except Exception as e:
+        _observe_request(model, "chat", started, "error", stage="llm")
+        # Return a fallback response in case of API error
+        return f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
+
+async def get_openai_response_async(system_prompt: str, user_prompt: str, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Get a response from OpenAI's API without blocking the event loop
+    """
+    # Check if we're in development mode
+    environment = os.getenv("ENVIRONMENT", "development")
+    
+    if environment == "development":
+        # Return a mock response for development
+        return f"This is a mock response to your question: '{user_prompt}'. In a production environment, this would be answered by an AI model."
+    
+    started = time.perf_counter()
+    try:
+        # Rate limited, retried and guarded by the model's circuit breaker
+        send = lambda: get_async_client().post(
+            "/chat/completions",
+            json={
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                "temperature": 0.7,
+                "max_tokens": CHAT_MAX_TOKENS
+            }
+        )
+        # OpenAI counts max_tokens against the token limit up front
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + CHAT_MAX_TOKENS
+        async with get_guard(model).request(send, tokens) as response:
+            body = response.json()
+        _observe_request(model, "chat", started, "success", stage="llm")
+        record_llm_usage(model, body.get("usage"))
+        return body["choices"][0]["message"]["content"].strip()
+    except Exception as e:
+        _observe_request(model, "chat", started, "error", stage="llm")
         # Return a fallback response in case of API error
-        return f"Sorry, I encountered an error while processing your request: {str(e)}"
+        return f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
+
+async def stream_openai_response(system_prompt: str, user_prompt: str, model: str = "gpt-3.5-turbo"):
+    """
+    Stream a response from OpenAI's API, yielding content tokens as they arrive
+    """
+    # Check if we're in development mode
+    environment = os.getenv("ENVIRONMENT", "development")
+    
+    if environment == "development":
+        # Stream the mock response word by word for development
+        mock_response = f"This is a mock response to your question: '{user_prompt}'. In a production environment, this would be answered by an AI model."
+        for i, word in enumerate(mock_response.split(" ")):
+            yield word if i == 0 else " " + word
+        return
+    
+    started = time.perf_counter()
+    chunks = 0
+    try:
+        client = get_async_client()
+        # Only opening the stream is retried; nothing has been yielded yet then
+        send = lambda: client.send(
+            client.build_request(
+                "POST",
+                "/chat/completions",
+                json={
+                    "model": model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "temperature": 0.7,
+                    "max_tokens": CHAT_MAX_TOKENS,
+                    "stream": True
+                }
+            ),
+            stream=True
+        )
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + CHAT_MAX_TOKENS
+        async with get_guard(model).request(send, tokens) as response:
+            async for line in response.aiter_lines():
+                # Server-sent events: only "data:" lines carry payloads
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    if chunks == 0:
+                        LLM_FIRST_TOKEN.observe(time.perf_counter() - started, model=model)
+                    chunks += 1
+                    yield delta["content"]
+        _observe_request(model, "chat_stream", started, "success", stage="llm")
+    except Exception as e:
+        _observe_request(model, "chat_stream", started, "error", stage="llm")
+        # Yield a fallback response in case of API error
+        yield f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
+    finally:
+        # Streamed responses carry no usage; each content delta is about one token
+        if chunks:
+            LLM_TOKENS.inc(chunks, model=model, type="completion")
 
 def get_embedding(text: str, model: str = "text-embedding-ada-002") -> list:
     """
@@ -51,4 +217,62 @@ def get_embedding(text: str, model: str = "text-embedding-ada-002") -> list:
         )
         return response.data[0].embedding
     except Exception as e:
-        raise Exception(f"Error getting embedding: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error getting embedding: {str(e)}")
+
+async def get_embedding_async(text: str, model: str = "text-embedding-ada-002") -> list:
+    """
+    Get embeddings for text using OpenAI's embedding API without blocking the event loop
+    """
+    # Check if we're in development mode
+    environment = os.getenv("ENVIRONMENT", "development")
+    
+    if environment == "development":
+        # Return a mock embedding for development
+        return [0.1] * 1536  # Mock embedding vector
+    
+    started = time.perf_counter()
+    try:
+        send = lambda: get_async_client().post(
+            "/embeddings",
+            json={"input": text, "model": model}
+        )
+        async with get_guard(model).request(send, estimate_tokens(text)) as response:
+            body = response.json()
+        _observe_request(model, "embeddings", started, "success")
+        record_llm_usage(model, body.get("usage"))
+        return body["data"][0]["embedding"]
+    except Exception as e:
+        _observe_request(model, "embeddings", started, "error")
+        raise Exception(f"Error getting embedding: {str(e)}")
+
+
+async def get_embeddings_async(texts: list, model: str = "text-embedding-ada-002") -> list:
+    """
+    Get embeddings for several texts in a single multi-input request
+    """
+    # Check if we're in development mode
+    environment = os.getenv("ENVIRONMENT", "development")
+    
+    if environment == "development":
+        # Return mock embeddings for development
+        return [[0.1] * 1536 for _ in texts]  # Mock embedding vectors
+    
+    if not texts:
+        return []
+    
+    started = time.perf_counter()
+    try:
+        send = lambda: get_async_client().post(
+            "/embeddings",
+            json={"input": list(texts), "model": model}
+        )
+        async with get_guard(model).request(send, sum(estimate_tokens(text) for text in texts)) as response:
+            body = response.json()
+        _observe_request(model, "embeddings", started, "success")
+        record_llm_usage(model, body.get("usage"))
+        # Results carry their input index; don't rely on response order
+        data = sorted(body["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+    except Exception as e:
+        _observe_request(model, "embeddings", started, "error")
+        raise Exception(f"Error getting embeddings: {str(e)}")
\ No newline at end of file
@@ -1,94 +1,149 @@
 #!/usr/bin/env python3
 """
-Script to populate the Qdrant collection with sample book content.
+Script to populate the vector store (Qdrant, or the local index when
+VECTOR_STORE=local) with the book chapters.
+
+Reads every Markdown file in the book's docs directory, embeds chunks in
+multi-input batches and upserts them in large batches. Chunks are
+content-addressed, so re-running after an edit only embeds changed chunks
+and removes chunks that no longer exist.
 """
 
+import argparse
+import asyncio
+import hashlib
 import os
 import sys
+import time
+import uuid
 from dotenv import load_dotenv
 
 # Add the parent directory to the path to import from api module
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from ai.qdrant_service import store_embeddings
-from ai.openai_service import get_embedding
+from ai.content_store import delete_texts, store_texts, strip_text, uses_content_store
+from ai.vector_store import get_vector_store
+from ai.openai_service import get_embeddings_async, close_async_client
+from ai.chunker import chunk_markdown, CHUNK_MAX_TOKENS
+from utils.book import BOOK_DOCS_DIR, load_all_chapters
+
+# Namespace for deterministic point ids derived from chunk content
+POINT_ID_NAMESPACE = uuid.UUID("6f1b4a52-3c1e-4f8e-9a43-2d7c5b0e8a11")
 
-def chunk_text(text, chunk_size=1000, overlap=200):
+def build_chunks(chapters: dict, max_tokens: int = CHUNK_MAX_TOKENS) -> list:
+    """
+    Chunk every chapter, returning point records with content-addressed ids
     """
-    Split text into overlapping chunks.
+    records = []
+    for chapter_id, content in chapters.items():
+        occurrences = {}
+        for chunk in chunk_markdown(content, chapter_id, max_tokens=max_tokens):
+            content_hash = hashlib.sha256(chunk["text"].encode("utf-8")).hexdigest()
+            # Identical chunks in one chapter (e.g. repeated exercise blocks)
+            # need distinct ids; the first keeps the plain content address
+            occurrence = occurrences.get(content_hash, 0)
+            occurrences[content_hash] = occurrence + 1
+            name = f"{chapter_id}:{content_hash}" + (f":{occurrence}" if occurrence else "")
+            records.append({
+                "id": str(uuid.uuid5(POINT_ID_NAMESPACE, name)),
+                "payload": {**chunk, "content_hash": content_hash}
+            })
+    return records
+
+def batched(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+async def ingest(store, records: list, embed_batch_size: int, upsert_batch_size: int, concurrency: int):
     """
-    words = text.split()
-    chunks = []
+    Embed and upsert records with bounded parallelism
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    stored = 0
+    
+    async def embed(batch):
+        async with semaphore:
+            return await get_embeddings_async([record["payload"]["text"] for record in batch])
+    
+    async def ingest_group(group):
+        nonlocal stored
+        # Embed the group's sub-batches concurrently, then upsert them in one request
+        batches = list(batched(group, embed_batch_size))
+        embeddings = await asyncio.gather(*(embed(batch) for batch in batches))
+        points = [
+            {"id": record["id"], "vector": vector, "payload": strip_text(record["payload"])}
+            for batch, vectors in zip(batches, embeddings)
+            for record, vector in zip(batch, vectors)
+        ]
+        async with semaphore:
+            # Texts go in first, so no indexed point is ever missing its text
+            if uses_content_store():
+                await store_texts(group)
+            await store.upsert(points)
+        stored += len(points)
+        print(f"Stored {stored}/{len(records)} chunks")
+    
+    await asyncio.gather(*(ingest_group(group) for group in batched(records, upsert_batch_size)))
+
+async def populate(docs_dir: str, max_tokens: int, embed_batch_size: int, upsert_batch_size: int, concurrency: int, force: bool):
+    chapters = load_all_chapters(docs_dir)
+    print(f"Found {len(chapters)} chapters in {docs_dir}")
+    
+    store = get_vector_store()
+    await store.create_collection()
+    if uses_content_store():
+        from database.migrations import create_tables
+        create_tables()
+    
+    records = build_chunks(chapters, max_tokens)
+    # Stale points are found even when forcing, which only re-embeds everything
+    indexed = await store.get_indexed_hashes()
     
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = ' '.join(words[i:i + chunk_size])
-        chunks.append(chunk)
-        if i + chunk_size >= len(words):
-            break
+    pending = records if force else [record for record in records if record["id"] not in indexed]
+    current_ids = {record["id"] for record in records}
+    stale = [point_id for point_id in indexed if point_id not in current_ids]
+    print(f"{len(records)} chunks: {len(records) - len(pending)} already indexed, "
+          f"{len(pending)} to embed, {len(stale)} stale")
     
-    return chunks
+    try:
+        if stale:
+            await store.delete(stale)
+            if uses_content_store():
+                await delete_texts(stale)
+        if pending:
+            await ingest(store, pending, embed_batch_size, upsert_batch_size, concurrency)
+    finally:
+        await close_async_client()
 
 def main():
-    """Main function to populate Qdrant collection with sample content."""
+    """Main function to populate the vector store with the book content."""
     load_dotenv()
     
-    # Sample book content (in a real scenario, this would come from actual book chapters)
-    sample_content = {
-        "chapter1": {
-            "title": "Fundamentals of AI in Education",
-            "content": """Artificial Intelligence (AI) is transforming education by enabling personalized learning experiences, automating administrative tasks, and providing intelligent tutoring systems. This chapter introduces the core concepts and applications of AI in educational settings.
-
-AI in education refers to the use of machine learning algorithms, natural language processing, computer vision, and other AI technologies to enhance teaching and learning processes. Unlike traditional educational software, AI systems can adapt to individual learners, provide real-time feedback, and continuously improve based on data.
-
-Key Applications:
-1. Personalized Learning Paths: AI systems analyze learner data to create customized learning paths that adapt to individual needs, preferences, and progress rates.
-2. Intelligent Tutoring Systems: These systems provide one-on-one instruction and feedback, simulating human tutoring experiences with scalability.
-3. Automated Assessment and Feedback: AI can grade assignments, provide instant feedback, and identify areas where students need additional support.
-4. Predictive Analytics: By analyzing patterns in student data, AI can predict which students might struggle and intervene early.
-
-Benefits of AI in Education:
-Enhanced Personalization: Every learner has unique strengths, weaknesses, and learning preferences. AI enables truly personalized educational experiences that adapt in real-time.
-Scalability: Quality education can be scaled to reach more learners without compromising the personal touch that's crucial for effective learning.
-Accessibility: AI-powered tools can make education more accessible to learners with disabilities through features like speech-to-text, text-to-speech, and visual assistance.
-Data-Driven Insights: Educators gain valuable insights into learning patterns, helping them improve curriculum design and teaching methods.
-
-Challenges and Considerations:
-Privacy and Data Security: Educational data is sensitive and must be protected. Institutions must implement robust security measures and transparent data policies.
-Equity and Access: While AI can democratize education, unequal access to technology can exacerbate existing educational disparities.
-Ethical AI Development: AI systems must be developed with fairness, transparency, and accountability to avoid reinforcing biases or discrimination.
-
-The Future of AI in Education:
-As AI technology continues to evolve, we can expect even more sophisticated educational tools that provide hyper-personalized learning experiences, immersive simulations, and seamless integration between physical and digital learning environments."""
-        }
-    }
+    parser = argparse.ArgumentParser(description="Populate the vector store with the book chapters.")
+    parser.add_argument("--docs-dir", default=BOOK_DOCS_DIR, help="Directory containing the chapter Markdown files")
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_MAX_TOKENS, help="Maximum tokens per chunk")
+    parser.add_argument("--embed-batch-size", type=int, default=128, help="Texts per embedding request")
+    parser.add_argument("--upsert-batch-size", type=int, default=512, help="Points per upsert request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent embedding/upsert requests")
+    parser.add_argument("--force", action="store_true", help="Re-embed every chunk, even if already indexed")
+    args = parser.parse_args()
     
-    print("Populating Qdrant collection with sample content...")
+    print("Populating vector store with book content...")
+    started = time.perf_counter()
     
     try:
-        # Process each chapter
-        for chapter_id, chapter_data in sample_content.items():
-            print(f"Processing chapter: {chapter_data['title']}")
-            
-            # Chunk the content
-            chunks = chunk_text(chapter_data['content'])
-            print(f"Split into {len(chunks)} chunks")
-            
-            # Process each chunk
-            for i, chunk in enumerate(chunks):
-                # Generate embedding
-                embedding = get_embedding(chunk)
-                
-                # Create a unique ID for this chunk
-                chunk_id = f"{chapter_id}_chunk_{i}"
-                
-                # Store in Qdrant
-                store_embeddings(chunk_id, chunk, embedding)
-                print(f"Stored chunk {i+1}/{len(chunks)}")
-        
-        print("Qdrant collection populated successfully!")
+        asyncio.run(populate(
+            args.docs_dir,
+            args.max_tokens,
+            args.embed_batch_size,
+            args.upsert_batch_size,
+            args.concurrency,
+            args.force
+        ))
+        print(f"Vector store populated successfully in {time.perf_counter() - started:.1f}s!")
     except Exception as e:
-        print(f"Error populating Qdrant collection: {str(e)}")
+        print(f"Error populating vector store: {str(e)}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,30 +1,83 @@
 import qdrant_client
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    CompressionRatio, Distance, PointStruct, ProductQuantization, ProductQuantizationConfig,
+    QuantizationSearchParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams, VectorParams,
+)
 import os
+import sys
 from dotenv import load_dotenv
 
-load_dotenv()
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Initialize Qdrant client
-client = qdrant_client.QdrantClient(
-    url=os.getenv("QDRANT_URL"),
-    api_key=os.getenv("QDRANT_API_KEY")
-)
+from ai.quantization import VECTOR_QUANTIZATION, VECTOR_RESCORE_OVERSAMPLING, get_quantizer_class
+
+load_dotenv()
 
 COLLECTION_NAME = "book_chapters"
+VECTOR_SIZE = 1536
+
+# Qdrant clients, created lazily on first use so importing this module
+# never requires a reachable Qdrant server
+_client = None
+_async_client = None
+
+def get_client() -> qdrant_client.QdrantClient:
+    global _client
+    if _client is None:
+        _client = qdrant_client.QdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY")
+        )
+    return _client
+
+def get_async_client() -> qdrant_client.AsyncQdrantClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = qdrant_client.AsyncQdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY")
+        )
+    return _async_client
+
+def quantization_config():
+    """
+    Qdrant quantization for VECTOR_QUANTIZATION: int8 scalar or x16 product
+    codes kept in RAM, or None to store float vectors only
+    """
+    get_quantizer_class(VECTOR_QUANTIZATION)  # Rejects unknown values
+    if VECTOR_QUANTIZATION == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if VECTOR_QUANTIZATION == "product":
+        return ProductQuantization(product=ProductQuantizationConfig(compression=CompressionRatio.X16, always_ram=True))
+    return None
+
+def search_params():
+    """
+    Rescore oversampled quantized candidates with the original vectors
+    """
+    if quantization_config() is None:
+        return None
+    return SearchParams(quantization=QuantizationSearchParams(rescore=True, oversampling=VECTOR_RESCORE_OVERSAMPLING))
 
 def create_collection():
     """
     Create a collection for storing book chapter embeddings
     """
+    quantization = quantization_config()
     try:
-        client.create_collection(
+        get_client().create_collection(
             collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=1536, distance=Distance.COSINE)
+            # With quantization the float vectors are only read for rescoring, so keep them on disk
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE, on_disk=quantization is not None),
+            quantization_config=quantization
         )
         print(f"Collection '{COLLECTION_NAME}' created successfully")
     except Exception as e:
         print(f"Collection already exists or error occurred: {str(e)}")
+        if quantization is not None:
+            # Existing collections pick up the quantization setting too
+            get_client().update_collection(collection_name=COLLECTION_NAME, quantization_config=quantization)
 
 def store_embeddings(chapter_id: str, text: str, embedding: list):
     """
@@ -38,7 +91,7 @@ def store_embeddings(chapter_id: str, text: str, embedding: list):
         )
     ]
     
-    client.upsert(
+    get_client().upsert(
         collection_name=COLLECTION_NAME,
         points=points
     )
@@ -47,10 +100,57 @@ def search_similar_chunks(query_embedding: list, limit: int = 5):
     """
     Search for similar text chunks based on query embedding
     """
-    search_result = client.search(
+    search_result = get_client().search(
         collection_name=COLLECTION_NAME,
         query_vector=query_embedding,
         limit=limit
     )
     
-    return search_result
\ No newline at end of file
+    return search_result
+
+async def search_similar_chunks_async(query_embedding: list, limit: int = 5, score_threshold: float = None):
+    """
+    Search for similar text chunks without blocking the event loop,
+    dropping results scoring below score_threshold
+    """
+    return await get_async_client().search(
+        collection_name=COLLECTION_NAME,
+        query_vector=query_embedding,
+        limit=limit,
+        score_threshold=score_threshold,
+        search_params=search_params()
+    )
+
+async def upsert_points_async(points: list):
+    """
+    Upsert a batch of points in a single request
+    """
+    await get_async_client().upsert(
+        collection_name=COLLECTION_NAME,
+        points=points
+    )
+
+async def get_indexed_hashes_async(batch_size: int = 1024) -> dict:
+    """
+    Return {point_id: content_hash} for every indexed chunk
+    """
+    indexed = {}
+    offset = None
+    while True:
+        points, offset = await get_async_client().scroll(
+            collection_name=COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["content_hash"],
+            with_vectors=False
+        )
+        for point in points:
+            indexed[str(point.id)] = (point.payload or {}).get("content_hash")
+        if offset is None:
+            return indexed
+
+async def delete_points_async(point_ids: list):
+    await get_async_client().delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=point_ids
+    )
\ No newline at end of file
@@ -0,0 +1,171 @@
+import os
+import sys
+from typing import Optional
+import numpy as np
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+
+# "none" (default), "scalar" (int8) or "product" quantization of stored vectors
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+# Quantized search fetches this many times the requested results, then
+# rescores them with the original float vectors
+VECTOR_RESCORE_OVERSAMPLING = float(os.getenv("VECTOR_RESCORE_OVERSAMPLING", 4))
+# Dimensions per product quantization subspace (1536 / 8 = 192 one-byte codes)
+PQ_SUBVECTOR_DIM = int(os.getenv("PQ_SUBVECTOR_DIM", 8))
+
+# Rows scored per step; small enough that each block's float temporaries
+# stay in cache, which makes the scan several times faster than one pass
+SCAN_BLOCK_ROWS = 2048
+
+class ScalarQuantizer:
+    """
+    Store each dimension as an int8 between that dimension's minimum and
+    maximum: a quarter of the float32 size. Scores are computed directly
+    on the codes, without decoding them.
+    """
+    kind = "scalar"
+
+    def __init__(self, minimum: np.ndarray, scale: np.ndarray):
+        self.minimum = minimum.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray) -> "ScalarQuantizer":
+        minimum = matrix.min(axis=0)
+        scale = (matrix.max(axis=0) - minimum) / 255
+        scale[scale == 0] = 1.0
+        return cls(minimum, scale)
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        codes = np.rint((matrix - self.minimum) / self.scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # x = minimum + scale * (code + 128), so q.x = (q * scale).code + constant
+        weights = query * self.scale
+        offset = float(query @ self.minimum + 128 * weights.sum())
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            block = codes[start:start + SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ weights + offset
+        return scores
+
+    def params(self) -> dict:
+        return {"minimum": self.minimum, "scale": self.scale}
+
+    @classmethod
+    def from_params(cls, params) -> "ScalarQuantizer":
+        return cls(params["minimum"], params["scale"])
+
+    def codes_shape(self, rows: int) -> tuple:
+        return (rows, len(self.minimum))
+
+    @property
+    def code_dtype(self):
+        return np.int8
+
+    @property
+    def nbytes(self) -> int:
+        return self.minimum.nbytes + self.scale.nbytes
+
+class ProductQuantizer:
+    """
+    Split vectors into subvectors and store each as the one-byte id of its
+    nearest k-means centroid, e.g. 192 bytes instead of 6 KB for 1536
+    dimensions. Scores are sums of per-subspace lookups in a small table
+    computed once per query. Codes are stored subspace-major (one row of
+    codes per subspace), so each lookup pass reads contiguous memory.
+    """
+    kind = "product"
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = centroids.astype(np.float32)  # (subspaces, centroids, subvector dim)
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray, subvector_dim: int = PQ_SUBVECTOR_DIM, iterations: int = 10,
+            max_training_rows: int = 10000, seed: int = 0) -> "ProductQuantizer":
+        rows, dim = matrix.shape
+        if dim % subvector_dim:
+            raise ValueError(f"Vector dimension {dim} is not a multiple of PQ_SUBVECTOR_DIM={subvector_dim}")
+        rng = np.random.default_rng(seed)
+        sample = matrix[rng.choice(rows, min(rows, max_training_rows), replace=False)]
+        clusters = min(256, len(sample))
+        subspaces = sample.reshape(len(sample), dim // subvector_dim, subvector_dim).transpose(1, 0, 2)
+        centroids = np.stack([
+            _kmeans(np.ascontiguousarray(subspace), clusters, iterations, rng) for subspace in subspaces
+        ])
+        return cls(centroids)
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        subspaces, _, subvector_dim = self.centroids.shape
+        codes = np.empty((subspaces, len(matrix)), dtype=np.uint8)
+        for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+            block = matrix[start:start + SCAN_BLOCK_ROWS].reshape(-1, subspaces, subvector_dim)
+            for subspace in range(subspaces):
+                codes[subspace, start:start + len(block)] = _nearest(block[:, subspace], self.centroids[subspace])
+        return codes
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        subspaces, _, subvector_dim = self.centroids.shape
+        # table[s, c] = dot product of the query's subvector s with centroid c
+        table = np.einsum("scd,sd->sc", self.centroids, query.reshape(subspaces, subvector_dim))
+        scores = np.zeros(codes.shape[1], dtype=np.float32)
+        for subspace in range(subspaces):
+            scores += np.take(table[subspace], codes[subspace])
+        return scores
+
+    def params(self) -> dict:
+        return {"centroids": self.centroids}
+
+    @classmethod
+    def from_params(cls, params) -> "ProductQuantizer":
+        return cls(params["centroids"])
+
+    def codes_shape(self, rows: int) -> tuple:
+        return (self.centroids.shape[0], rows)
+
+    @property
+    def code_dtype(self):
+        return np.uint8
+
+    @property
+    def nbytes(self) -> int:
+        return self.centroids.nbytes
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # argmin of |v - c|^2 = |v|^2 - 2 v.c + |c|^2, where |v|^2 doesn't matter
+    distances = (centroids ** 2).sum(axis=1) - 2 * vectors @ centroids.T
+    return distances.argmin(axis=1)
+
+def _kmeans(vectors: np.ndarray, clusters: int, iterations: int, rng) -> np.ndarray:
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(vectors, centroids)
+        counts = np.bincount(assignment, minlength=clusters)
+        sums = np.stack([
+            np.bincount(assignment, weights=vectors[:, dim], minlength=clusters)
+            for dim in range(vectors.shape[1])
+        ], axis=1)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Reseed empty clusters so every code stays useful
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.integers(len(vectors), size=len(empty))]
+    return centroids
+
+QUANTIZERS = {"scalar": ScalarQuantizer, "product": ProductQuantizer}
+
+def get_quantizer_class(kind: str) -> Optional[type]:
+    """
+    Return the quantizer for a VECTOR_QUANTIZATION value, None for "none"
+    """
+    if kind in ("", "none"):
+        return None
+    if kind not in QUANTIZERS:
+        raise ValueError(f"Unknown VECTOR_QUANTIZATION: {kind}")
+    return QUANTIZERS[kind]
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import httpx
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import registry
+
+load_dotenv()
+
+# Defaults for every model; 0 disables the corresponding rate limit
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", 0))
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", 0))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", 200))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 3))
+OPENAI_RETRY_BASE_SECONDS = float(os.getenv("OPENAI_RETRY_BASE_SECONDS", 0.5))
+OPENAI_RETRY_MAX_SECONDS = float(os.getenv("OPENAI_RETRY_MAX_SECONDS", 20))
+OPENAI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("OPENAI_CIRCUIT_FAILURE_THRESHOLD", 5))
+OPENAI_CIRCUIT_RESET_SECONDS = float(os.getenv("OPENAI_CIRCUIT_RESET_SECONDS", 30))
+# Per-model overrides of the settings above, as JSON, e.g.
+# {"gpt-3.5-turbo": {"requests_per_minute": 3500, "tokens_per_minute": 90000}}
+OPENAI_MODEL_LIMITS = os.getenv("OPENAI_MODEL_LIMITS", "")
+
+# Overloaded or failing upstream responses worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+UPSTREAM_RETRIES = registry.counter(
+    "llm_retries_total", "Retried upstream OpenAI requests by reason", ("model", "reason"))
+UPSTREAM_THROTTLED = registry.histogram(
+    "llm_throttle_wait_seconds", "Time spent waiting for the client-side rate limiter", ("model",))
+CIRCUIT_STATE = registry.gauge(
+    "llm_circuit_open", "Whether the circuit breaker for a model is open (1) or closed (0)", ("model",))
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a model whose circuit breaker is open
+    """
+
+class ModelLimits:
+    def __init__(self, requests_per_minute: float = OPENAI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = OPENAI_TOKENS_PER_MINUTE,
+                 max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+                 max_retries: int = OPENAI_MAX_RETRIES,
+                 failure_threshold: int = OPENAI_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = OPENAI_CIRCUIT_RESET_SECONDS):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+def _load_model_limits() -> dict:
+    if not OPENAI_MODEL_LIMITS:
+        return {}
+    try:
+        return {model: ModelLimits(**settings) for model, settings in json.loads(OPENAI_MODEL_LIMITS).items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Ignoring invalid OPENAI_MODEL_LIMITS: {str(e)}")
+        return {}
+
+class TokenBucket:
+    """
+    Client-side rate limiter refilling ``per_minute`` units a minute, with
+    bursts of up to a minute's worth.
+
+    The rate adapts to the upstream: ``throttle`` pauses all callers and
+    halves the rate after a rate-limit response, and each success recovers
+    a twentieth of the configured rate. A rate of 0 only applies pauses.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.max_rate = per_minute / 60
+        self.rate = self.max_rate
+        self.tokens = per_minute
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float = 1) -> float:
+        """
+        Take ``amount`` units, returning how long the caller must wait first
+        """
+        now = time.monotonic()
+        delay = max(0.0, self.blocked_until - now)
+        if not self.max_rate:
+            return delay
+        # Requests larger than the bucket would otherwise never be served
+        amount = min(amount, self.capacity)
+        self._refill(now)
+        self.tokens -= amount
+        if self.tokens < 0:
+            delay = max(delay, -self.tokens / self.rate)
+        return delay
+
+    def throttle(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        if self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = max(self.rate / 2, self.max_rate / 10)
+
+    def record_success(self):
+        if self.rate < self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream after ``failure_threshold`` consecutive
+    failures. After ``reset_seconds`` a single trial call is let through;
+    its success closes the circuit again, its failure reopens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def check(self):
+        state = self.state
+        now = time.monotonic()
+        # A trial that never reported back (e.g. cancelled) doesn't block forever
+        trial_running = self._trial_started is not None and now - self._trial_started < self.reset_seconds
+        if state == "open" or (state == "half_open" and trial_running):
+            raise CircuitOpenError(f"Upstream for {self.name} is unavailable, retry later")
+        if state == "half_open":
+            self._trial_started = now
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+        CIRCUIT_STATE.set(0, model=self.name)
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_started = None
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"Opening circuit for {self.name} after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            CIRCUIT_STATE.set(1, model=self.name)
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """
+    Seconds the upstream asked us to wait, from Retry-After (seconds or an
+    HTTP date) or OpenAI's retry-after-ms header
+    """
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_seconds(attempt: int, base: float = OPENAI_RETRY_BASE_SECONDS,
+                    cap: float = OPENAI_RETRY_MAX_SECONDS) -> float:
+    """
+    Exponential backoff with full jitter
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class UpstreamGuard:
+    """
+    Rate limits, concurrency cap, retries and circuit breaker for one model
+    """
+
+    def __init__(self, model: str, limits: ModelLimits):
+        self.model = model
+        self.limits = limits
+        self.requests = TokenBucket(limits.requests_per_minute)
+        self.tokens = TokenBucket(limits.tokens_per_minute)
+        self.semaphore = asyncio.Semaphore(limits.max_concurrency)
+        self.breaker = CircuitBreaker(model, limits.failure_threshold, limits.reset_seconds)
+
+    async def acquire(self, tokens: int):
+        delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if delay:
+            UPSTREAM_THROTTLED.observe(delay, model=self.model)
+            await asyncio.sleep(delay)
+
+    def throttle(self, seconds: float):
+        self.requests.throttle(seconds)
+        self.tokens.throttle(seconds)
+
+    def record_success(self):
+        self.requests.record_success()
+        self.tokens.record_success()
+        self.breaker.record_success()
+
+    @asynccontextmanager
+    async def request(self, send, tokens: int = 0):
+        """
+        Send a request with ``send()`` (a coroutine function returning an
+        httpx response, which may be streaming), retrying overloaded and
+        failed attempts, and yield the successful response. The concurrency
+        slot is held until the block exits, so streamed bodies count too.
+        """
+        attempt = 0
+        while True:
+            self.breaker.check()
+            await self.acquire(tokens)
+            async with self.semaphore:
+                try:
+                    response = await send()
+                except httpx.TransportError as e:
+                    self.breaker.record_failure()
+                    if attempt >= self.limits.max_retries:
+                        raise
+                    reason, delay = type(e).__name__, backoff_seconds(attempt)
+                else:
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        if response.is_error:
+                            # The request itself is at fault; retrying won't help
+                            await response.aclose()
+                            self.breaker.record_success()
+                            response.raise_for_status()
+                        self.record_success()
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+
+                    await response.aclose()
+                    delay = retry_after_seconds(response)
+                    if response.status_code == 429:
+                        delay = delay if delay is not None else backoff_seconds(attempt)
+                        self.throttle(delay)
+                    else:
+                        self.breaker.record_failure()
+                        delay = delay if delay is not None else backoff_seconds(attempt)
+                    # Don't keep the caller waiting longer than the retry cap
+                    if attempt >= self.limits.max_retries or delay > OPENAI_RETRY_MAX_SECONDS:
+                        response.raise_for_status()
+                    reason = str(response.status_code)
+            UPSTREAM_RETRIES.inc(model=self.model, reason=reason)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "requests_per_minute": self.requests.rate * 60,
+            "tokens_per_minute": self.tokens.rate * 60,
+        }
+
+_model_limits = _load_model_limits()
+_guards = {}
+
+def get_guard(model: str) -> UpstreamGuard:
+    guard = _guards.get(model)
+    if guard is None:
+        guard = _guards[model] = UpstreamGuard(model, _model_limits.get(model, ModelLimits()))
+    return guard
+
+def upstream_stats() -> dict:
+    return {model: guard.stats() for model, guard in _guards.items()}
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sys
+from typing import List
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.content_store import hydrate_texts
+from ai.embedding_batcher import EmbeddingBatcher
+from ai.lexical_index import get_lexical_index, get_lexical_index_stats, reciprocal_rank_fusion
+from ai.vector_store import get_vector_store
+from utils.cache import LRUCache, SingleFlight, content_hash
+from utils.metrics import register_cache
+from utils.tracing import span
+from utils.tokens import estimate_tokens, truncate_to_tokens
+
+load_dotenv()
+
+# Retrieval is on by default whenever a vector store is configured
+RAG_ENABLED = os.getenv(
+    "RAG_ENABLED",
+    "true" if os.getenv("QDRANT_URL") or os.getenv("VECTOR_STORE", "").lower() == "local" else "false"
+).lower() == "true"
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", 5))
+RAG_SCORE_THRESHOLD = float(os.getenv("RAG_SCORE_THRESHOLD", 0.75))
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 1500))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 10000))
+# "hybrid" fuses BM25 and vector search; "vector" or "lexical" use one alone
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+# In hybrid mode, answer from the lexical index alone when the query
+# embedding or vector search takes longer than this, or fails
+RAG_VECTOR_TIMEOUT_MS = float(os.getenv("RAG_VECTOR_TIMEOUT_MS", 1500))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", 60))
+
+# Query embeddings keyed on the normalized query text, so repeated
+# questions skip the embedding round trip entirely
+embedding_cache = LRUCache(max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+_embedding_flight = SingleFlight()
+
+# Concurrent cache misses are embedded together in multi-input requests
+embedding_batcher = EmbeddingBatcher(model=EMBEDDING_MODEL)
+
+register_cache("query_embedding", embedding_cache.stats)
+
+# Hybrid retrievals answered from the lexical index alone
+_lexical_fallbacks = 0
+
+async def embed_query(query: str) -> list:
+    """
+    Embed a query, served from the embedding cache when possible
+    """
+    cache_key = (content_hash(query), EMBEDDING_MODEL)
+    cached = embedding_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    async def embed():
+        embedding = await embedding_batcher.embed(query)
+        embedding_cache.set(cache_key, embedding)
+        return embedding
+
+    with span("embedding"):
+        return await _embedding_flight.do(cache_key, embed)
+
+async def vector_search(query: str, limit: int, score_threshold: float):
+    query_embedding = await embed_query(query)
+    with span("vector_search"):
+        results = await get_vector_store().search(query_embedding, limit=limit, score_threshold=score_threshold)
+    # Chunk text may live in the content store rather than the payloads
+    return await hydrate_texts(results)
+
+def lexical_search(query: str, limit: int):
+    with span("lexical_search"):
+        return get_lexical_index().search(query, limit=limit)
+
+def _consume_result(task: asyncio.Task):
+    # Abandoned searches may fail later; don't warn about unretrieved errors
+    if not task.cancelled():
+        task.exception()
+
+async def retrieve_chunks(query: str, limit: int = RAG_TOP_K, score_threshold: float = RAG_SCORE_THRESHOLD):
+    """
+    Return the book chunks most relevant to the query, best first
+    """
+    global _lexical_fallbacks
+    if RETRIEVAL_MODE == "vector":
+        return await vector_search(query, limit, score_threshold)
+    lexical = lexical_search(query, limit)
+    if RETRIEVAL_MODE == "lexical":
+        return lexical
+
+    # A slow search keeps running after we stop waiting, so its embedding
+    # is cached for the next time the question is asked
+    task = asyncio.ensure_future(vector_search(query, limit, score_threshold))
+    task.add_done_callback(_consume_result)
+    try:
+        dense = await asyncio.wait_for(asyncio.shield(task), RAG_VECTOR_TIMEOUT_MS / 1000)
+    except Exception as e:
+        _lexical_fallbacks += 1
+        reason = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+        print(f"Vector search unavailable ({reason}), using lexical results only")
+        return lexical
+    # Dense results passed the score threshold; without any, the question
+    # isn't about the book and keyword matches alone don't make it so
+    if not dense:
+        return []
+    return reciprocal_rank_fusion([dense, lexical], limit=limit, k=RAG_RRF_K)
+
+def assemble_context(chunks, token_budget: int = RAG_CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Concatenate retrieved chunks, best first, until the token budget is spent
+    """
+    parts: List[str] = []
+    remaining = token_budget
+    for chunk in chunks:
+        payload = chunk.payload
+        text = payload.get("text", "").strip()
+        if not text:
+            continue
+        source = " > ".join(filter(None, [payload.get("chapter_id"), *payload.get("heading_path", [])]))
+        part = f"[{source}]\n{text}" if source else text
+        tokens = estimate_tokens(part)
+        if tokens > remaining:
+            # Include a truncated piece of the chunk only if a useful amount fits
+            if remaining >= 100:
+                parts.append(truncate_to_tokens(part, remaining))
+            break
+        parts.append(part)
+        remaining -= tokens
+    return "\n\n".join(parts)
+
+async def retrieve_context(query: str, token_budget: int = RAG_CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Retrieve and assemble book context for a query. Retrieval is best-effort:
+    when it is disabled or the vector store is unavailable, returns "".
+    """
+    if not RAG_ENABLED:
+        return ""
+    try:
+        chunks = await retrieve_chunks(query)
+    except Exception as e:
+        print(f"Retrieval failed, answering without book context: {str(e)}")
+        return ""
+    return assemble_context(chunks, token_budget)
+
+async def warm_retrieval():
+    """
+    Load the vector store and build the lexical index ahead of the first
+    question (called on startup)
+    """
+    if RAG_ENABLED and RETRIEVAL_MODE != "lexical":
+        await asyncio.to_thread(get_vector_store)
+    if RAG_ENABLED and RETRIEVAL_MODE != "vector":
+        await asyncio.to_thread(get_lexical_index)
+
+def get_retrieval_stats() -> dict:
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "mode": RETRIEVAL_MODE,
+        "lexical_fallbacks": _lexical_fallbacks,
+        "lexical_index": get_lexical_index_stats()
+    }
\ No newline at end of file
@@ -0,0 +1,101 @@
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import List, NamedTuple, Optional
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+
+# "qdrant" (default) or "local" for the in-process NumPy index
+VECTOR_STORE = os.getenv("VECTOR_STORE", "qdrant").lower()
+
+class SearchResult(NamedTuple):
+    """
+    A scored chunk, shaped like Qdrant's ScoredPoint
+    """
+    id: str
+    score: float
+    payload: dict
+
+class VectorStore(ABC):
+    """
+    Interface shared by the vector store backends.
+
+    Points are dicts with ``id``, ``vector`` and ``payload`` keys.
+    """
+
+    @abstractmethod
+    async def create_collection(self):
+        ...
+
+    @abstractmethod
+    async def search(self, query_embedding: list, limit: int = 5,
+                     score_threshold: Optional[float] = None) -> List[SearchResult]:
+        ...
+
+    @abstractmethod
+    async def upsert(self, points: List[dict]):
+        ...
+
+    @abstractmethod
+    async def delete(self, point_ids: List[str]):
+        ...
+
+    @abstractmethod
+    async def get_indexed_hashes(self) -> dict:
+        """
+        Return {point_id: content_hash} for every indexed chunk
+        """
+
+    async def close(self):
+        pass
+
+class QdrantVectorStore(VectorStore):
+    """
+    Backend for a remote Qdrant server
+    """
+
+    async def create_collection(self):
+        from ai.qdrant_service import create_collection
+        create_collection()
+
+    async def search(self, query_embedding, limit=5, score_threshold=None):
+        from ai.qdrant_service import search_similar_chunks_async
+        results = await search_similar_chunks_async(query_embedding, limit=limit, score_threshold=score_threshold)
+        return [SearchResult(str(point.id), point.score, point.payload or {}) for point in results]
+
+    async def upsert(self, points):
+        from qdrant_client.models import PointStruct
+        from ai.qdrant_service import upsert_points_async
+        await upsert_points_async([
+            PointStruct(id=point["id"], vector=point["vector"], payload=point["payload"])
+            for point in points
+        ])
+
+    async def delete(self, point_ids):
+        from ai.qdrant_service import delete_points_async
+        await delete_points_async(point_ids)
+
+    async def get_indexed_hashes(self):
+        from ai.qdrant_service import get_indexed_hashes_async
+        return await get_indexed_hashes_async()
+
+_store = None
+
+def get_vector_store() -> VectorStore:
+    """
+    Return the configured vector store backend (VECTOR_STORE env var)
+    """
+    global _store
+    if _store is None:
+        if VECTOR_STORE == "local":
+            from ai.local_vector_store import LocalVectorStore
+            _store = LocalVectorStore()
+        elif VECTOR_STORE == "qdrant":
+            _store = QdrantVectorStore()
+        else:
+            raise ValueError(f"Unknown VECTOR_STORE backend: {VECTOR_STORE}")
+    return _store
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Script to precompute chapter translations and personalizations for static serving.
+
+Translates every chapter (and, with --personalize, personalizes it for
+every profile bucket) using a pool of parallel workers, and writes the
+results as content-hashed artifacts plus a manifest that the API serves
+from GET /api/translate/chapters/{id} and GET /api/personalize/chapters/{id}.
+Artifacts whose chapter source and model are unchanged are skipped, so
+re-running after an edit only rebuilds what changed.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Add the parent directory to the path to import from api module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.openai_service import ERROR_RESPONSE_PREFIX, close_async_client
+from artifacts.store import ARTIFACTS_DIR, PERSONALIZATION, TRANSLATION, ArtifactWriter, bucket_variant
+from database.migrations import create_tables
+from personalization.cache import all_profile_buckets
+from personalization.service import PERSONALIZATION_MODEL, personalize_for_bucket
+from translation.service import TRANSLATION_MODEL, translate_chapter
+from utils.book import list_chapters, load_chapter
+from utils.cache import content_hash
+
+def plan_jobs(chapters: dict, languages: list, personalize: bool, writer: ArtifactWriter, force: bool) -> list:
+    """
+    Return (kind, variant, chapter_id, model) for every artifact that is
+    missing or out of date
+    """
+    jobs = []
+    for chapter_id, content in chapters.items():
+        source_hash = content_hash(content)
+        wanted = [(TRANSLATION, language, TRANSLATION_MODEL) for language in languages]
+        if personalize:
+            wanted += [(PERSONALIZATION, bucket, PERSONALIZATION_MODEL) for bucket in all_profile_buckets()]
+        for kind, variant, model in wanted:
+            name = variant if kind == TRANSLATION else bucket_variant(variant)
+            if force or not writer.is_current(kind, name, chapter_id, source_hash, model):
+                jobs.append((kind, variant, chapter_id, model))
+    return jobs
+
+async def build(chapters: dict, jobs: list, writer: ArtifactWriter, workers: int) -> list:
+    """
+    Run the jobs on a pool of workers, returning the jobs that failed
+    """
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+    failed = []
+    done = 0
+
+    async def run(kind, variant, chapter_id):
+        content = chapters[chapter_id]
+        if kind == TRANSLATION:
+            result = await translate_chapter(content, variant)
+            return result["translated_content"]
+        return await personalize_for_bucket(variant, content)
+
+    async def worker():
+        nonlocal done
+        while not queue.empty():
+            kind, variant, chapter_id, model = queue.get_nowait()
+            name = variant if kind == TRANSLATION else bucket_variant(variant)
+            try:
+                output = await run(kind, variant, chapter_id)
+                # Failed upstream calls come back as error text (per block for
+                # translations); never publish those
+                if ERROR_RESPONSE_PREFIX in output:
+                    raise Exception("upstream call failed")
+                writer.write(kind, name, chapter_id, content_hash(chapters[chapter_id]), model, output)
+            except Exception as e:
+                failed.append((kind, name, chapter_id))
+                print(f"Failed {kind} {name} {chapter_id}: {str(e)}")
+            done += 1
+            print(f"[{done}/{len(jobs)}] {kind} {name} {chapter_id}")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        await close_async_client()
+    return failed
+
+def main():
+    """Main function to build the static chapter artifacts."""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("chapters", nargs="*", help="Chapter ids to build (default: all chapters)")
+    parser.add_argument("--languages", nargs="+", default=["ur"], help="Target language codes to translate into")
+    parser.add_argument("--personalize", action="store_true", help="Also personalize every chapter for every profile bucket")
+    parser.add_argument("--workers", type=int, default=8, help="Chapters processed in parallel")
+    parser.add_argument("--output", default=ARTIFACTS_DIR, help="Artifacts directory (ARTIFACTS_DIR)")
+    parser.add_argument("--force", action="store_true", help="Rebuild artifacts even if they are up to date")
+    args = parser.parse_args()
+
+    chapter_ids = args.chapters or list_chapters()
+    chapters = {chapter_id: load_chapter(chapter_id) for chapter_id in chapter_ids}
+    missing = [chapter_id for chapter_id, content in chapters.items() if content is None]
+    if missing:
+        print(f"Error: unknown chapters: {', '.join(missing)}")
+        sys.exit(1)
+
+    # The block translation and personalization caches persist to the
+    # database, so an edited chapter only re-translates its changed blocks
+    create_tables()
+
+    writer = ArtifactWriter(args.output)
+    # Drop artifacts of chapters that no longer exist
+    existing = set(list_chapters())
+    writer.entries = {key: entry for key, entry in writer.entries.items() if key.rsplit("/", 1)[-1] in existing}
+
+    jobs = plan_jobs(chapters, args.languages, args.personalize, writer, args.force)
+    print(f"Building {len(jobs)} artifacts for {len(chapters)} chapters with {args.workers} workers...")
+    started = time.perf_counter()
+    failed = asyncio.run(build(chapters, jobs, writer, args.workers)) if jobs else []
+
+    pruned = writer.publish()
+    print(f"Published {len(writer.entries)} artifacts to {args.output} in {time.perf_counter() - started:.1f}s "
+          f"({len(jobs) - len(failed)} built, {pruned} old files removed)")
+    if failed:
+        print(f"Error: {len(failed)} artifacts failed to build")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
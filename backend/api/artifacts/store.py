@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+from datetime import datetime
+from typing import NamedTuple, Optional
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.book import chapter_path
+from utils.cache import LRUCache, content_hash
+from utils.http_cache import strong_etag
+
+load_dotenv()
+
+# Precomputed chapter translations and personalizations (see artifacts/build.py)
+ARTIFACTS_DIR = os.getenv(
+    "ARTIFACTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "artifacts")
+)
+# Browsers and CDNs may reuse a served artifact this long before revalidating
+ARTIFACT_MAX_AGE = int(os.getenv("ARTIFACT_MAX_AGE", 3600))
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", 50_000_000))
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+TRANSLATION = "translation"
+PERSONALIZATION = "personalization"
+
+class Artifact(NamedTuple):
+    body: bytes
+    etag: str
+    source_hash: str
+    model: str
+    built_at: str
+
+def artifact_key(kind: str, variant: str, chapter_id: str) -> str:
+    return f"{kind}/{variant}/{chapter_id}"
+
+def bucket_variant(bucket) -> str:
+    """
+    File-system safe name of a profile bucket, e.g. beginner.advanced.reading-writing
+    """
+    return ".".join(bucket).replace("/", "-")
+
+class ArtifactStore:
+    """
+    Versioned build artifacts on disk, indexed by a manifest.
+
+    Artifact files are named after the hash of their content and never
+    modified, so serving processes can cache them freely; a build writes
+    new files and then atomically replaces the manifest. The manifest is
+    reloaded whenever it changes on disk, so deploying a new build needs
+    no restart. Each entry records the hash of the chapter source it was
+    built from, and entries whose chapter has since changed are not served.
+    """
+
+    def __init__(self, path: str = ARTIFACTS_DIR):
+        self.path = path
+        self.entries = {}
+        self._manifest_mtime = None
+        self._bodies = LRUCache(max_entries=10000, max_size=ARTIFACT_CACHE_MAX_BYTES)
+        self._source_hashes = {}  # chapter_id -> (mtime, hash)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            self.entries, self._manifest_mtime = {}, None
+            return
+        if mtime == self._manifest_mtime:
+            return
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.entries = manifest.get("artifacts", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+        self._manifest_mtime = mtime
+
+    def source_hash(self, chapter_id: str) -> Optional[str]:
+        """
+        Hash of a chapter's current source, recomputed only when the file changes
+        """
+        path = chapter_path(chapter_id)
+        if path is None:
+            return None
+        mtime = os.path.getmtime(path)
+        cached = self._source_hashes.get(chapter_id)
+        if cached is None or cached[0] != mtime:
+            with open(path, encoding="utf-8") as f:
+                cached = self._source_hashes[chapter_id] = (mtime, content_hash(f.read()))
+        return cached[1]
+
+    def get(self, kind: str, variant: str, chapter_id: str) -> Optional[Artifact]:
+        """
+        Return the artifact built from the chapter's current source, or None
+        """
+        self._refresh()
+        entry = self.entries.get(artifact_key(kind, variant, chapter_id))
+        if entry is None or entry["source_hash"] != self.source_hash(chapter_id):
+            return None
+        body = self._bodies.get(entry["path"])
+        if body is None:
+            try:
+                with open(os.path.join(self.path, entry["path"]), "rb") as f:
+                    body = f.read()
+            except OSError:
+                return None
+            self._bodies.set(entry["path"], body)
+        return Artifact(body, entry["etag"], entry["source_hash"], entry.get("model", ""), entry.get("built_at", ""))
+
+    def stats(self) -> dict:
+        self._refresh()
+        return {"artifacts": len(self.entries), "cached_bodies": self._bodies.stats()}
+
+class ArtifactWriter:
+    """
+    Write artifacts for a build and publish them with a new manifest
+    """
+
+    def __init__(self, path: str = ARTIFACTS_DIR):
+        self.path = path
+        self.entries = {}
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.entries = manifest.get("artifacts", {})
+
+    def is_current(self, kind: str, variant: str, chapter_id: str, source_hash: str, model: str) -> bool:
+        entry = self.entries.get(artifact_key(kind, variant, chapter_id))
+        return (
+            entry is not None
+            and entry["source_hash"] == source_hash
+            and entry.get("model") == model
+            and os.path.exists(os.path.join(self.path, entry["path"]))
+        )
+
+    def write(self, kind: str, variant: str, chapter_id: str, source_hash: str, model: str, content: str):
+        body = content.encode("utf-8")
+        etag = strong_etag(body)
+        # Files are named after their content, so a served version never changes
+        version = etag.strip('"')[:16]
+        relative_path = os.path.join(kind, variant, f"{chapter_id}.{version}.md")
+        full_path = os.path.join(self.path, relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(full_path + ".tmp", full_path)
+        self.entries[artifact_key(kind, variant, chapter_id)] = {
+            "path": relative_path,
+            "etag": etag,
+            "source_hash": source_hash,
+            "model": model,
+            "built_at": datetime.utcnow().isoformat(),
+        }
+
+    def publish(self, prune: bool = True) -> int:
+        """
+        Atomically replace the manifest, then delete artifact files it no
+        longer references. Returns the number of files pruned.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "built_at": datetime.utcnow().isoformat(),
+                       "artifacts": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        if not prune:
+            return 0
+
+        referenced = {entry["path"] for entry in self.entries.values()}
+        pruned = 0
+        for kind in (TRANSLATION, PERSONALIZATION):
+            for root, _, files in os.walk(os.path.join(self.path, kind)):
+                for name in files:
+                    relative_path = os.path.relpath(os.path.join(root, name), self.path)
+                    if relative_path not in referenced:
+                        os.remove(os.path.join(root, name))
+                        pruned += 1
+        return pruned
+
+artifact_store = ArtifactStore()
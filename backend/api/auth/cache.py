@@ -0,0 +1,94 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import hashlib
+import sys
+import os
+import time
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.models import UserResponse
+from database.models import User
+from utils.cache import LRUCache
+from utils.metrics import register_cache
+
+load_dotenv()
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 300))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+
+# Detached user profiles keyed by email. The TTL bounds how stale a profile
+# can be in other worker processes after it changes in this one.
+user_cache = LRUCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+register_cache("user", user_cache.stats)
+
+# Users whose verified tokens are cached, keyed by the token's hash, so
+# repeat requests skip signature verification. Entries also expire at the
+# token's own expiry.
+token_cache = LRUCache(max_entries=TOKEN_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+register_cache("token", token_cache.stats)
+
+# (changed_at, version) of each recently changed profile. Verified-token
+# entries from before changed_at, and tokens minted with an older profile
+# version, no longer describe the user.
+profile_changes = LRUCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def to_user_response(user: User) -> UserResponse:
+    return UserResponse.model_validate(user, from_attributes=True)
+
+def cache_user(user: User) -> UserResponse:
+    profile = to_user_response(user)
+    user_cache.set(profile.email, profile)
+    return profile
+
+async def get_cached_user_by_email(db: AsyncSession, email: str):
+    """
+    Return the user's profile, loading it from the database only on a cache miss
+    """
+    profile = user_cache.get(email)
+    if profile is not None:
+        return profile
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if user is None:
+        return None
+    return cache_user(user)
+
+def invalidate_user(email: str):
+    user_cache.pop(email)
+    profile_changes.set(email, (time.time(), profile_version(email) + 1))
+
+def profile_changed_since(email: str, timestamp: float) -> bool:
+    change = profile_changes.get(email)
+    return change is not None and change[0] >= timestamp
+
+def profile_version(email: str) -> int:
+    """
+    Count of recent profile changes. Once no token from before the last
+    change can still be valid, this is back to 0.
+    """
+    change = profile_changes.get(email)
+    return change[1] if change is not None else 0
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def get_verified_user(key: str):
+    """
+    Return the user for an already verified token, or None
+    """
+    entry = token_cache.get(key)
+    if entry is None:
+        return None
+    user, expires_at, verified_at = entry
+    if expires_at <= time.time() or profile_changed_since(user.email, verified_at):
+        token_cache.pop(key)
+        return None
+    return user
+
+def cache_verified_user(key: str, user: UserResponse, expires_at: float):
+    token_cache.set(key, (user, expires_at, time.time()))
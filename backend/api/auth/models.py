@@ -15,6 +15,11 @@ class UserLogin(BaseModel):
     email: str
     password: str
 
+class UserProfileUpdate(BaseModel):
+    software_experience: Optional[str] = None
+    hardware_experience: Optional[str] = None
+    learning_style: Optional[str] = None
+
 class UserResponse(UserBase):
     id: int
     software_experience: str
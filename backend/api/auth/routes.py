@@ -1,21 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 import sys
 import os
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db
+from database import get_async_db
 from auth import models, service
-from utils.auth import create_access_token, get_current_user
+from auth.cache import get_cached_user_by_email, to_user_response
+from utils.auth import create_access_token, create_user_access_token, get_current_user
 
 router = APIRouter()
 
 @router.post("/signup", response_model=models.Token)
-async def signup(user: models.UserCreate, db: Session = Depends(get_db)):
+async def signup(user: models.UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    db_user = service.get_user_by_email(db, email=user.email)
+    db_user = await service.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -23,14 +24,14 @@ async def signup(user: models.UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user with profile
-    new_user = service.create_user_with_profile(db, user)
+    new_user = await service.create_user_with_profile(db, user)
     
-    # Create access token
-    access_token = create_access_token(data={"sub": new_user.email})
+    # Create access token carrying the profile claims
+    access_token = create_user_access_token(to_user_response(new_user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/signin", response_model=models.Token)
-async def signin(user: models.UserLogin):
+async def signin(user: models.UserLogin, db: AsyncSession = Depends(get_async_db)):
     # Authenticate user with BetterAuth
     auth_user = service.authenticate_user_with_better_auth(user.email, user.password)
     if not auth_user:
@@ -40,10 +41,31 @@ async def signin(user: models.UserLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token
-    access_token = create_access_token(data={"sub": user.email})
+    # Create access token, with profile claims when the user has a profile
+    profile = await get_cached_user_by_email(db, email=user.email)
+    if profile is not None:
+        access_token = create_user_access_token(profile)
+    else:
+        access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/profile", response_model=models.UserResponse)
 async def get_profile(current_user: models.UserResponse = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.put("/profile", response_model=models.UserResponse)
+async def update_profile(
+    profile: models.UserProfileUpdate,
+    response: Response,
+    current_user: models.UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    updated_user = await service.update_user_profile(db, current_user.email, profile)
+    if updated_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    # Tokens issued earlier carry the old profile claims; hand out a fresh one
+    response.headers["X-Access-Token"] = create_user_access_token(to_user_response(updated_user))
+    return updated_user
\ No newline at end of file
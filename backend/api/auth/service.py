@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import sys
 import os
 from dotenv import load_dotenv
@@ -7,6 +8,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from auth import models
+from auth.cache import cache_user, invalidate_user
 from database.models import User
 
 load_dotenv()
@@ -20,10 +22,11 @@ load_dotenv()
 # )
 auth = None  # Placeholder until we implement the correct API usage
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def create_user_with_profile(db: Session, user: models.UserCreate):
+async def create_user_with_profile(db: AsyncSession, user: models.UserCreate):
     # For now, we'll create a simple user without BetterAuth integration
     # This is a temporary solution until we implement the correct API usage
     
@@ -36,8 +39,21 @@ def create_user_with_profile(db: Session, user: models.UserCreate):
         learning_style=user.learning_style
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    cache_user(db_user)
+    return db_user
+
+async def update_user_profile(db: AsyncSession, email: str, profile: models.UserProfileUpdate):
+    db_user = await get_user_by_email(db, email)
+    if db_user is None:
+        return None
+    for field, value in profile.model_dump(exclude_none=True).items():
+        setattr(db_user, field, value)
+    await db.commit()
+    await db.refresh(db_user)
+    # Drop the stale profile so the next request reloads it
+    invalidate_user(email)
     return db_user
 
 def authenticate_user_with_better_auth(email: str, password: str):
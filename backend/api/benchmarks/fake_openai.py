@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI API used by the benchmarks.
+
+Serves /chat/completions (plain and streamed) and /embeddings with
+configurable latency, jitter and token rate, and deterministic embeddings
+derived from the input text, so load tests run offline and repeatably.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+EMBEDDING_DIM = 1536
+
+class FakeOpenAIConfig:
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 50,
+                 token_rate: float = 100, completion_tokens: int = 50,
+                 embedding_latency_ms: float = 20):
+        self.latency_ms = latency_ms  # Time to first token
+        self.jitter_ms = jitter_ms
+        self.token_rate = token_rate  # Tokens per second after the first
+        self.completion_tokens = completion_tokens
+        self.embedding_latency_ms = embedding_latency_ms
+
+    def delay(self, base_ms: float) -> float:
+        return max(0.0, base_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> list:
+    """
+    A unit vector seeded by the text, identical for identical inputs
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def create_app(config: FakeOpenAIConfig) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = {"chat": 0, "stream": 0, "embeddings": 0}
+
+    def completion_words():
+        return [f"word{i}" if i == 0 else f" word{i}" for i in range(config.completion_tokens)]
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(config.delay(config.latency_ms))
+        words = completion_words()
+
+        if body.get("stream"):
+            app.state.requests["stream"] += 1
+
+            async def events():
+                for word in words:
+                    yield f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n"
+                    await asyncio.sleep(1 / config.token_rate)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        app.state.requests["chat"] += 1
+        await asyncio.sleep(len(words) / config.token_rate)
+        return {
+            "choices": [{"message": {"role": "assistant", "content": "".join(words)}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+        }
+
+    @app.post("/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        app.state.requests["embeddings"] += 1
+        await asyncio.sleep(config.delay(config.embedding_latency_ms))
+        return {
+            "data": [{"index": i, "embedding": fake_embedding(text)} for i, text in enumerate(inputs)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class FakeOpenAIServer:
+    """
+    Run the fake API with uvicorn on a background thread, so it has its own
+    event loop and doesn't skew the measurements of the app under test
+    """
+
+    def __init__(self, config: FakeOpenAIConfig, port: int = None):
+        import uvicorn
+        self.port = port or free_port()
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join()
+
+def main():
+    """Main function to run the fake OpenAI server standalone"""
+    parser = argparse.ArgumentParser(description="Run a local fake OpenAI API for benchmarks")
+    parser.add_argument("--port", type=int, default=8001, help="Port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Random +/- variation of latencies")
+    parser.add_argument("--token-rate", type=float, default=100, help="Completion tokens per second")
+    parser.add_argument("--completion-tokens", type=int, default=50, help="Tokens per completion")
+    parser.add_argument("--embedding-latency-ms", type=float, default=20, help="Latency of embedding requests")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeOpenAIConfig(args.latency_ms, args.jitter_ms, args.token_rate,
+                              args.completion_tokens, args.embedding_latency_ms)
+    print(f"Point OPENAI_API_BASE at http://127.0.0.1:{args.port}")
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Load test and latency benchmark for the API.
+
+Runs the app in-process under uvicorn against the local fake OpenAI
+server, a temporary SQLite database and a local vector store seeded with
+the book chapters, then drives concurrent load from a separate thread and
+reports throughput, latency percentiles and event-loop blocking time for
+each scenario. Needs no network access or API keys.
+
+    python benchmarks/load_test.py --requests 500 --concurrency 50
+    python benchmarks/load_test.py --output baseline.json
+    python benchmarks/load_test.py --baseline baseline.json --max-regression 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Add the parent directory to the path to import from api module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer, fake_embedding, free_port
+
+SCENARIOS = ("chat", "chat_stream", "translate", "personalize")
+
+SAMPLE_QUESTIONS = [
+    "What is physical AI?",
+    "How do robots perceive their environment?",
+    "What sensors does a humanoid robot use?",
+    "Explain the role of simulation in robotics.",
+    "How does reinforcement learning apply to locomotion?",
+    "What is ROS 2 used for?",
+    "How do vision-language-action models work?",
+    "What are the safety concerns for humanoid robots?",
+]
+
+SAMPLE_PARAGRAPH = (
+    "Physical AI systems combine perception, planning and control so that a robot can "
+    "act safely in the real world. Each section of this chapter builds on the last."
+)
+
+def configure_environment(workdir: str, openai_base_url: str):
+    """
+    Point the app at the fake API, a scratch database and a local vector
+    store. Must run before any app module is imported.
+    """
+    os.environ["ENVIRONMENT"] = "production"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_API_BASE"] = openai_base_url
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ["VECTOR_STORE"] = "local"
+    os.environ["LOCAL_VECTOR_STORE_PATH"] = os.path.join(workdir, "vector_store")
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    # Fake embeddings are random, so accept any match to exercise context assembly
+    os.environ.setdefault("RAG_SCORE_THRESHOLD", "0")
+
+def seed_vector_store() -> int:
+    """
+    Index the book chapters with fake embeddings, returning the chunk count
+    """
+    from ai.local_vector_store import LocalVectorStore
+    from ai.populate_qdrant import build_chunks
+    from utils.book import load_all_chapters
+
+    records = build_chunks(load_all_chapters())
+    points = [
+        {"id": record["id"], "vector": fake_embedding(record["payload"]["text"]), "payload": record["payload"]}
+        for record in records
+    ]
+    if points:
+        asyncio.run(LocalVectorStore().upsert(points))
+    return len(points)
+
+def build_request(scenario: str, index: int, repeat_ratio: float):
+    """
+    Return (path, json body, stream) for one request. A `repeat_ratio`
+    share of requests reuse a small hot set of inputs, the rest are unique.
+    """
+    hot = random.random() < repeat_ratio
+    question = random.choice(SAMPLE_QUESTIONS)
+    paragraph = SAMPLE_PARAGRAPH
+    if not hot:
+        question = f"{question} (variant {index})"
+        paragraph = f"{SAMPLE_PARAGRAPH} Note {index}."
+
+    if scenario == "chat":
+        return "/api/chat/", {"query": question}, False
+    if scenario == "chat_stream":
+        return "/api/chat/", {"query": question, "stream": True}, True
+    if scenario == "translate":
+        return "/api/translate/", {"text": paragraph, "target_language": "ur"}, False
+    return "/api/personalize/", {"content": paragraph}, False
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": float(max(values)) * 1000}
+
+class LoopLagMonitor:
+    """
+    Measure event-loop blocking: a task sleeps for `interval` and records
+    how much later than scheduled it wakes up
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def reset(self):
+        self.samples = []
+
+    def stats(self) -> dict:
+        lag = percentiles(self.samples)
+        return {
+            "loop_lag_p99_ms": lag["p99_ms"],
+            "loop_lag_max_ms": lag["max_ms"],
+            "loop_blocked_ms": 1000 * sum(self.samples),
+        }
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+async def drive_load(base_url: str, scenario: str, requests: int, concurrency: int, repeat_ratio: float) -> dict:
+    import httpx
+
+    latencies = []
+    first_token = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker(client):
+        nonlocal errors
+        for index in next_index:
+            path, body, stream = build_request(scenario, index, repeat_ratio)
+            started = time.perf_counter()
+            try:
+                if stream:
+                    async with client.stream("POST", path, json=body) as response:
+                        response.raise_for_status()
+                        first = None
+                        async for _ in response.aiter_bytes():
+                            if first is None:
+                                first = time.perf_counter() - started
+                        first_token.append(first)
+                else:
+                    response = await client.post(path, json=body)
+                    response.raise_for_status()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        **percentiles(latencies),
+    }
+    if first_token:
+        result["first_token"] = percentiles(first_token)
+    return result
+
+async def run_benchmark(args, fake_server) -> dict:
+    import uvicorn
+    from main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    results = {}
+    try:
+        for scenario in args.scenarios:
+            upstream_before = dict(fake_server.app.state.requests)
+            monitor.reset()
+            # The load generator gets its own thread and loop, so only the
+            # app's work shows up in the loop lag measurements
+            result = await asyncio.to_thread(
+                asyncio.run,
+                drive_load(f"http://127.0.0.1:{port}", scenario, args.requests, args.concurrency, args.repeat_ratio)
+            )
+            result.update(monitor.stats())
+            result["upstream_requests"] = {
+                kind: count - upstream_before[kind] for kind, count in fake_server.app.state.requests.items()
+            }
+            results[scenario] = result
+            print_result(scenario, result)
+    finally:
+        await monitor.stop()
+        server.should_exit = True
+        await serve_task
+    return results
+
+def print_result(scenario: str, result: dict):
+    line = (
+        f"{scenario:<12} {result['throughput_rps']:8.1f} req/s  "
+        f"p50 {result['p50_ms']:7.1f}  p95 {result['p95_ms']:7.1f}  p99 {result['p99_ms']:7.1f} ms  "
+        f"errors {result['errors']}  loop blocked {result['loop_blocked_ms']:.1f} ms "
+        f"(max lag {result['loop_lag_max_ms']:.1f} ms)"
+    )
+    if "first_token" in result:
+        line += f"  first token p95 {result['first_token']['p95_ms']:.1f} ms"
+    print(line)
+    print(f"{'':<12} upstream calls: {result['upstream_requests']}")
+
+def find_regressions(results: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Compare p95 latency and throughput with a previous run
+    """
+    regressions = []
+    for scenario, result in results.items():
+        before = baseline.get(scenario)
+        if not before:
+            continue
+        if before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{scenario}: p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+        if before["throughput_rps"] and result["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{scenario}: throughput {before['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s")
+    return regressions
+
+def main():
+    """Main function to run the load test"""
+    parser = argparse.ArgumentParser(description="Benchmark the API against a local fake OpenAI server")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS),
+                        help="Scenarios to run, in order")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--repeat-ratio", type=float, default=0.5,
+                        help="Share of requests drawn from a small hot set of inputs (exercises the caches)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Fake model time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Random +/- variation of fake latencies")
+    parser.add_argument("--token-rate", type=float, default=100, help="Fake completion tokens per second")
+    parser.add_argument("--completion-tokens", type=int, default=50, help="Tokens per fake completion")
+    parser.add_argument("--embedding-latency-ms", type=float, default=20, help="Fake embedding latency")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for inputs and jitter")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed relative p95/throughput regression against the baseline")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config = FakeOpenAIConfig(args.latency_ms, args.jitter_ms, args.token_rate,
+                              args.completion_tokens, args.embedding_latency_ms)
+    fake_server = FakeOpenAIServer(config)
+    fake_server.start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(workdir, fake_server.base_url)
+        from database.migrations import create_tables
+        create_tables()
+        print(f"Indexed {seed_vector_store()} chunks")
+
+        results = asyncio.run(run_benchmark(args, fake_server))
+    fake_server.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
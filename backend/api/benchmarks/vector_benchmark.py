@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark vector storage options for the local vector store.
+
+Indexes a synthetic corpus of clustered unit vectors (shaped like text
+embeddings) with float32 vectors, int8 scalar quantization and product
+quantization, with and without float rescoring, and reports recall@k
+against exact search, memory held per option and query latency. Also
+reports how much smaller payloads get when chunk text moves to the
+content store (CONTENT_STORE=database).
+
+    python benchmarks/vector_benchmark.py --vectors 20000 --queries 200
+    python benchmarks/vector_benchmark.py --output vectors.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Add the parent directory to the path to import from api module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.local_vector_store import CODES_FILE, LocalVectorStore, QUANTIZER_FILE, VECTORS_FILE
+from ai.quantization import VECTOR_RESCORE_OVERSAMPLING
+
+# (name, quantization, rescores oversampled candidates)
+CONFIGURATIONS = [
+    ("float32", "none", False),
+    ("int8", "scalar", False),
+    ("int8+rescore", "scalar", True),
+    ("pq", "product", False),
+    ("pq+rescore", "product", True),
+]
+
+def synthetic_corpus(vectors: int, queries: int, dim: int, clusters: int, seed: int):
+    """
+    Unit vectors scattered around random cluster centres, and queries that
+    are perturbed copies of corpus vectors
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    corpus = centres[rng.integers(clusters, size=vectors)] + 0.6 * rng.standard_normal((vectors, dim)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    picked = corpus[rng.integers(vectors, size=queries)]
+    query_vectors = picked + 0.03 * rng.standard_normal((queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return corpus, query_vectors
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list:
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+def resident_bytes(store: LocalVectorStore) -> int:
+    """
+    Memory a search scans: the float matrix, or the codes and quantizer
+    (float rows are then only read for the rescored candidates)
+    """
+    if store.codes is not None:
+        return store.codes.nbytes + store.quantizer.nbytes
+    return store.matrix.nbytes
+
+def disk_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in (VECTORS_FILE, CODES_FILE, QUANTIZER_FILE)
+        if os.path.exists(os.path.join(path, name))
+    )
+
+async def measure(store: LocalVectorStore, queries: np.ndarray, truth: list, k: int) -> dict:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        results = await store.search(query.tolist(), limit=k)
+        latencies.append(time.perf_counter() - started)
+        hits += len(expected & {int(result.id) for result in results})
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    return {f"recall@{k}": hits / (k * len(queries)), "p50_ms": float(p50), "p95_ms": float(p95)}
+
+def payload_sizes() -> dict:
+    """
+    Average stored payload size for the book's chunks, with text inline and
+    with text moved to the content store
+    """
+    from ai.populate_qdrant import build_chunks
+    from utils.book import load_all_chapters
+
+    payloads = [record["payload"] for record in build_chunks(load_all_chapters())]
+    if not payloads:
+        return {}
+    inline = sum(len(json.dumps(payload)) for payload in payloads) / len(payloads)
+    stripped = sum(
+        len(json.dumps({key: value for key, value in payload.items() if key != "text"})) for payload in payloads
+    ) / len(payloads)
+    return {"chunks": len(payloads), "inline_bytes": inline, "content_store_bytes": stripped}
+
+def main():
+    """Main function to run the vector storage benchmark"""
+    parser = argparse.ArgumentParser(description="Compare float, int8 and product-quantized vector storage")
+    parser.add_argument("--vectors", type=int, default=20000, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to run per configuration")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="Topic clusters in the synthetic corpus")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--oversampling", type=float, default=VECTOR_RESCORE_OVERSAMPLING,
+                        help="Candidates rescored per requested result in the +rescore configurations")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    corpus, queries = synthetic_corpus(args.vectors, args.queries, args.dim, args.clusters, args.seed)
+    truth = exact_top_k(corpus, queries, args.k)
+    points = [{"id": str(row), "vector": vector, "payload": {}} for row, vector in enumerate(corpus)]
+
+    results = {}
+    for name, quantization, rescore in CONFIGURATIONS:
+        with tempfile.TemporaryDirectory() as path:
+            # Without oversampling, rescoring only reorders the quantized top k
+            store = LocalVectorStore(path, quantization=quantization, oversampling=args.oversampling if rescore else 1)
+            started = time.perf_counter()
+            asyncio.run(store.upsert(points))
+            build_seconds = time.perf_counter() - started
+            result = asyncio.run(measure(store, queries, truth, args.k))
+            result.update({
+                "resident_mb": resident_bytes(store) / 2 ** 20,
+                "disk_mb": disk_bytes(path) / 2 ** 20,
+                "build_s": build_seconds,
+            })
+        results[name] = result
+        print(f"{name:<13} recall@{args.k} {result[f'recall@{args.k}']:.3f}  "
+              f"p50 {result['p50_ms']:6.2f}  p95 {result['p95_ms']:6.2f} ms  "
+              f"resident {result['resident_mb']:7.1f} MB  disk {result['disk_mb']:7.1f} MB  "
+              f"build {build_seconds:5.1f}s")
+
+    payloads = payload_sizes()
+    if payloads:
+        results["payloads"] = payloads
+        print(f"payloads      {payloads['inline_bytes']:.0f} bytes/chunk with text inline, "
+              f"{payloads['content_store_bytes']:.0f} with CONTENT_STORE=database ({payloads['chunks']} book chunks)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personalization.cache import ProfileBucket
+from utils.cache import content_hash
+from utils.metrics import register_cache
+
+load_dotenv()
+
+# Off by default in development, where every mock embedding is identical
+CHAT_ANSWER_CACHE_ENABLED = os.getenv(
+    "CHAT_ANSWER_CACHE_ENABLED",
+    "false" if os.getenv("ENVIRONMENT", "development") == "development" else "true"
+).lower() == "true"
+CHAT_ANSWER_CACHE_THRESHOLD = float(os.getenv("CHAT_ANSWER_CACHE_THRESHOLD", 0.95))
+CHAT_ANSWER_CACHE_TTL_SECONDS = float(os.getenv("CHAT_ANSWER_CACHE_TTL_SECONDS", 86400))
+CHAT_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_ANSWER_CACHE_MAX_ENTRIES", 10000))
+CHAT_ANSWER_CACHE_MAX_PER_SCOPE = int(os.getenv("CHAT_ANSWER_CACHE_MAX_PER_SCOPE", 256))
+
+class CachedAnswer(NamedTuple):
+    query: str
+    answer: str
+    score: float
+
+class _Entry(NamedTuple):
+    scope: str
+    query: str
+    answer: str
+    expires_at: float
+
+class _ScopeIndex:
+    """
+    The normalized query embeddings cached for one scope
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.vectors = []
+        self._matrix = None
+
+    def add(self, entry_id: int, vector: np.ndarray):
+        self.ids.append(entry_id)
+        self.vectors.append(vector)
+        self._matrix = None
+
+    def remove(self, entry_id: int):
+        position = self.ids.index(entry_id)
+        del self.ids[position]
+        del self.vectors[position]
+        self._matrix = None
+
+    def scores(self, vector: np.ndarray) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack(self.vectors)
+        return self._matrix @ vector
+
+def answer_cache_scope(user, context: Optional[str] = None) -> str:
+    """
+    Answers are only shared between queries asked with the same selected
+    context and by readers in the same profile bucket, since both shape
+    the prompt
+    """
+    bucket = ProfileBucket.from_user(user) if user else ProfileBucket("", "", "")
+    context_hash = content_hash(context) if context else ""
+    return hashlib.sha256(":".join((context_hash, *bucket)).encode("utf-8")).hexdigest()
+
+def _normalize(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticAnswerCache:
+    """
+    Cache chat answers by query meaning rather than exact text.
+
+    ``lookup`` returns the answer to the most similar query previously
+    answered in the same scope when its cosine similarity reaches
+    ``threshold``. Entries expire after ``ttl`` seconds; the least
+    recently used are evicted beyond ``max_entries`` overall or
+    ``max_entries_per_scope`` within a scope.
+    """
+
+    def __init__(self, threshold: float = CHAT_ANSWER_CACHE_THRESHOLD,
+                 ttl: float = CHAT_ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = CHAT_ANSWER_CACHE_MAX_ENTRIES,
+                 max_entries_per_scope: int = CHAT_ANSWER_CACHE_MAX_PER_SCOPE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_entries_per_scope = max_entries_per_scope
+        self._entries = OrderedDict()  # entry_id -> _Entry, least recently used first
+        self._last_used = {}  # entry_id -> use counter, to find a scope's least recently used entry
+        self._scopes = {}
+        self._next_id = 0
+        self._uses = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, scope: str, embedding) -> Optional[CachedAnswer]:
+        index = self._scopes.get(scope)
+        if index is not None:
+            self._expire(index)
+        index = self._scopes.get(scope)
+        if index is None:
+            self.misses += 1
+            return None
+
+        scores = index.scores(_normalize(embedding))
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        entry_id = index.ids[best]
+        entry = self._entries[entry_id]
+        self._touch(entry_id)
+        self.hits += 1
+        return CachedAnswer(entry.query, entry.answer, float(scores[best]))
+
+    def store(self, scope: str, embedding, query: str, answer: str):
+        vector = _normalize(embedding)
+        # A fresh answer replaces the ones lookup would otherwise still return
+        index = self._scopes.get(scope)
+        if index is not None:
+            scores = index.scores(vector)
+            for entry_id in [index.ids[i] for i in np.flatnonzero(scores >= self.threshold)]:
+                self._remove(entry_id)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = _Entry(scope, query, answer, time.monotonic() + self.ttl)
+        self._touch(entry_id)
+        index = self._scopes.setdefault(scope, _ScopeIndex())
+        index.add(entry_id, vector)
+        self.stores += 1
+
+        while len(index.ids) > self.max_entries_per_scope:
+            self._remove(min(index.ids, key=self._last_used.__getitem__))
+            self.evictions += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._last_used.clear()
+        self._scopes.clear()
+
+    def _touch(self, entry_id: int):
+        self._entries.move_to_end(entry_id)
+        self._uses += 1
+        self._last_used[entry_id] = self._uses
+
+    def _expire(self, index: _ScopeIndex):
+        now = time.monotonic()
+        expired = [entry_id for entry_id in index.ids if self._entries[entry_id].expires_at <= now]
+        for entry_id in expired:
+            self._remove(entry_id)
+        self.expirations += len(expired)
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        del self._last_used[entry_id]
+        index = self._scopes[entry.scope]
+        index.remove(entry_id)
+        if not index.ids:
+            del self._scopes[entry.scope]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": CHAT_ANSWER_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "scopes": len(self._scopes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+answer_cache = SemanticAnswerCache()
+register_cache("chat_answer", answer_cache.stats)
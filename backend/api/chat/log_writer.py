@@ -0,0 +1,171 @@
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from sqlalchemy import insert
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import AsyncSessionLocal
+from database.models import ChatLog
+from utils.metrics import registry
+
+load_dotenv()
+
+CHAT_LOG_QUEUE_SIZE = int(os.getenv("CHAT_LOG_QUEUE_SIZE", 10000))
+CHAT_LOG_BATCH_SIZE = int(os.getenv("CHAT_LOG_BATCH_SIZE", 100))
+CHAT_LOG_FLUSH_INTERVAL_MS = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL_MS", 250))
+CHAT_LOG_DRAIN_TIMEOUT = float(os.getenv("CHAT_LOG_DRAIN_TIMEOUT", 10))
+
+class ChatLogWriter:
+    """
+    Write chat logs in the background with batched inserts.
+
+    Requests call ``enqueue(...)``, which never waits on the database; a
+    worker task drains the bounded queue and bulk-inserts rows once
+    ``batch_size`` are waiting or ``flush_interval_ms`` has passed. When
+    the queue is full new records are dropped and counted.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal,
+                 max_queue_size: int = CHAT_LOG_QUEUE_SIZE,
+                 batch_size: int = CHAT_LOG_BATCH_SIZE,
+                 flush_interval_ms: float = CHAT_LOG_FLUSH_INTERVAL_MS):
+        self.session_factory = session_factory
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._closing = False
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+
+    def start(self):
+        """
+        Start the background worker on the running event loop
+        """
+        if self._worker is not None and not self._worker.done():
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._closing = False
+        self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, user_id: int, query: str, response: str,
+                session_id: str = None, timestamp: datetime = None) -> bool:
+        """
+        Queue a chat interaction for writing; returns False if it was dropped
+        """
+        if self._closing:
+            self.dropped += 1
+            return False
+        self.start()
+
+        row = {
+            "user_id": user_id,
+            "query": query,
+            "response": response,
+            "session_id": session_id,
+            "timestamp": timestamp or datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return True
+
+    async def stop(self, timeout: float = CHAT_LOG_DRAIN_TIMEOUT):
+        """
+        Stop accepting records and flush whatever is still queued
+        """
+        self._closing = True
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._worker, timeout)
+        except asyncio.TimeoutError:
+            lost = self._queue.qsize()
+            self.dropped += lost
+            print(f"Chat log writer did not drain in {timeout}s; dropped {lost} records")
+        self._worker = None
+        self._queue = None
+
+    async def _run(self):
+        while not (self._closing and self._queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _next_batch(self):
+        try:
+            first = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._closing:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # When draining, take everything already queued without waiting
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch):
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(ChatLog), batch)
+                await db.commit()
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Error writing {len(batch)} chat logs: {e}")
+            return
+        self.batches += 1
+        self.written += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": self.written / self.batches if self.batches else 0.0,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "max_queue_size": self.max_queue_size,
+        }
+
+chat_log_writer = ChatLogWriter()
+
+CHAT_LOG_QUEUE_DEPTH = registry.gauge("chat_log_queue_depth", "Chat logs waiting to be written")
+CHAT_LOG_RECORDS = registry.gauge("chat_log_records", "Chat log records since start by outcome", ("outcome",))
+
+def _collect_log_writer_metrics():
+    stats = chat_log_writer.stats()
+    CHAT_LOG_QUEUE_DEPTH.set(stats["pending"])
+    for outcome in ("written", "dropped", "failed"):
+        CHAT_LOG_RECORDS.set(stats[outcome], outcome=outcome)
+
+registry.add_collector(_collect_log_writer_metrics)
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime
+from typing import List, NamedTuple
+from dotenv import load_dotenv
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.openai_service import get_openai_response_async, is_error_response
+from database import AsyncSessionLocal
+from database.models import ChatLog, ChatSession
+from utils.cache import LRUCache, SingleFlight
+from utils.tokens import count_tokens, count_tokens_batch, truncate_to_tokens
+
+load_dotenv()
+
+CHAT_MEMORY_TOKEN_BUDGET = int(os.getenv("CHAT_MEMORY_TOKEN_BUDGET", 1000))
+CHAT_MEMORY_MAX_TURNS = int(os.getenv("CHAT_MEMORY_MAX_TURNS", 20))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", 300))
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "gpt-3.5-turbo")
+CHAT_MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_MEMORY_CACHE_MAX_ENTRIES", 5000))
+CHAT_MEMORY_CACHE_TTL_SECONDS = float(os.getenv("CHAT_MEMORY_CACHE_TTL_SECONDS", 1800))
+
+class Turn(NamedTuple):
+    query: str
+    response: str
+    timestamp: datetime
+    tokens: int
+
+def format_turn(query: str, response: str) -> str:
+    return f"User: {query}\nAssistant: {response}"
+
+class SessionWindow:
+    """
+    The part of a conversation that is sent with each new turn: a running
+    summary of older turns plus the most recent turns that fit the token
+    budget. The assembled prefix is kept until the window changes.
+    """
+
+    def __init__(self, session_id: str, user_id: int, summary: str = "",
+                 turns: List[Turn] = (), token_budget: int = CHAT_MEMORY_TOKEN_BUDGET):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.token_budget = token_budget
+        self.summary = summary or ""
+        self.summary_tokens = count_tokens(self.summary) if self.summary else 0
+        self.turns = list(turns)
+        self.overflow = []  # Turns pushed out of the window, waiting to be summarized
+        self._prefix = None
+        self._trim()
+
+    @property
+    def tokens(self) -> int:
+        return self.summary_tokens + sum(turn.tokens for turn in self.turns)
+
+    def add_turn(self, query: str, response: str, timestamp: datetime):
+        self.turns.append(Turn(query, response, timestamp, count_tokens(format_turn(query, response))))
+        self._trim()
+
+    def set_summary(self, summary: str, summarized: int):
+        """
+        Replace the summary after the oldest `summarized` overflow turns were folded into it
+        """
+        self.summary = summary
+        self.summary_tokens = count_tokens(summary)
+        self.overflow = self.overflow[summarized:]
+        self._trim()
+
+    def _trim(self):
+        # Always keep the latest turn, even if it alone exceeds the budget
+        while len(self.turns) > 1 and self.tokens > self.token_budget:
+            self.overflow.append(self.turns.pop(0))
+        self._prefix = None
+
+    def prefix(self) -> str:
+        if self._prefix is None:
+            parts = []
+            if self.summary:
+                parts.append(f"Summary of earlier conversation: {self.summary}")
+            parts.extend(format_turn(turn.query, turn.response) for turn in self.turns)
+            self._prefix = "\n\n".join(parts)
+        return self._prefix
+
+class ConversationMemory:
+    """
+    Server-side conversation sessions built on ChatLog history.
+
+    Windows are loaded from the database once and then kept in an LRU
+    cache, so follow-up turns neither re-read nor re-tokenize the history.
+    Turns that fall out of the window are folded into the session summary
+    by a background task.
+    """
+
+    def __init__(self, max_entries: int = CHAT_MEMORY_CACHE_MAX_ENTRIES,
+                 ttl: float = CHAT_MEMORY_CACHE_TTL_SECONDS,
+                 token_budget: int = CHAT_MEMORY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.windows = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._flight = SingleFlight()
+        self._summarizing = {}  # session_id -> summary task
+
+        # Metrics
+        self.loads = 0
+        self.summaries = 0
+        self.summary_errors = 0
+
+    async def create_session(self, db: AsyncSession, user_id: int) -> str:
+        session_id = str(uuid.uuid4())
+        db.add(ChatSession(id=session_id, user_id=user_id, summary=""))
+        await db.commit()
+        self.windows.set(session_id, SessionWindow(session_id, user_id, token_budget=self.token_budget))
+        return session_id
+
+    async def delete_session(self, db: AsyncSession, session_id: str, user_id: int) -> bool:
+        """
+        Delete a session; its chat logs are kept for analytics
+        """
+        session = await db.get(ChatSession, session_id)
+        if session is None or session.user_id != user_id:
+            return False
+        await db.delete(session)
+        await db.commit()
+        self.windows.pop(session_id)
+        return True
+
+    async def get_window(self, session_id: str, user_id: int):
+        """
+        Return the session's window, or None if the session doesn't exist
+        or belongs to another user
+        """
+        window = self.windows.get(session_id)
+        if window is None:
+            window = await self._flight.do(session_id, lambda: self._load(session_id))
+        if window is None or window.user_id != user_id:
+            return None
+        return window
+
+    async def _load(self, session_id: str):
+        async with AsyncSessionLocal() as db:
+            session = await db.get(ChatSession, session_id)
+            if session is None:
+                return None
+            stmt = select(ChatLog.query, ChatLog.response, ChatLog.timestamp).where(ChatLog.session_id == session_id)
+            if session.summarized_until is not None:
+                stmt = stmt.where(ChatLog.timestamp > session.summarized_until)
+            stmt = stmt.order_by(ChatLog.timestamp.desc()).limit(CHAT_MEMORY_MAX_TURNS)
+            rows = list(reversed((await db.execute(stmt)).all()))
+
+        self.loads += 1
+        token_counts = count_tokens_batch([format_turn(row.query, row.response) for row in rows])
+        turns = [Turn(row.query, row.response, row.timestamp, tokens) for row, tokens in zip(rows, token_counts)]
+        window = SessionWindow(session_id, session.user_id, session.summary, turns, self.token_budget)
+        self.windows.set(session_id, window)
+        return window
+
+    def record_turn(self, window: SessionWindow, query: str, response: str, timestamp: datetime):
+        window.add_turn(query, response, timestamp)
+        if window.overflow and window.session_id not in self._summarizing:
+            self._summarizing[window.session_id] = asyncio.create_task(self._summarize(window))
+
+    async def _summarize(self, window: SessionWindow):
+        try:
+            turns = list(window.overflow)
+            transcript = "\n\n".join(format_turn(turn.query, turn.response) for turn in turns)
+            system_prompt = "You maintain a running summary of a conversation between a reader and an assistant for an interactive book."
+            prompt = f"""
+            Update the summary with the new conversation turns. Keep the facts, questions and
+            conclusions that later turns may refer to, in under {CHAT_SUMMARY_MAX_TOKENS} tokens.
+
+            Current summary:
+            {window.summary or "(none)"}
+
+            New turns:
+            {transcript}
+            """
+            summary = await get_openai_response_async(system_prompt, prompt, model=CHAT_SUMMARY_MODEL)
+            if is_error_response(summary):
+                self.summary_errors += 1
+                return
+
+            summary = truncate_to_tokens(summary.strip(), CHAT_SUMMARY_MAX_TOKENS)
+            window.set_summary(summary, len(turns))
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(ChatSession)
+                    .where(ChatSession.id == window.session_id)
+                    .values(summary=summary, summarized_until=turns[-1].timestamp, updated_at=datetime.utcnow())
+                )
+                await db.commit()
+            self.summaries += 1
+        except Exception as e:
+            self.summary_errors += 1
+            print(f"Error summarizing conversation {window.session_id}: {str(e)}")
+        finally:
+            self._summarizing.pop(window.session_id, None)
+
+    async def drain(self):
+        """
+        Wait for in-flight summaries, e.g. before shutdown
+        """
+        if self._summarizing:
+            await asyncio.gather(*self._summarizing.values(), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "windows": self.windows.stats(),
+            "loads": self.loads,
+            "summaries": self.summaries,
+            "summary_errors": self.summary_errors,
+            "summarizing": len(self._summarizing),
+        }
+
+conversation_memory = ConversationMemory()
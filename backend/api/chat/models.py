@@ -1,9 +1,27 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 class ChatRequest(BaseModel):
     query: str
     context: Optional[str] = None  # Selected text from the user
+    stream: bool = False  # Stream tokens as server-sent events
+    bypass_cache: bool = False  # Always ask the model, ignoring cached answers
+    session_id: Optional[str] = None  # Continue a conversation session (see POST /sessions)
 
 class ChatResponse(BaseModel):
-    response: str
\ No newline at end of file
+    response: str
+    session_id: Optional[str] = None
+
+class ChatSessionResponse(BaseModel):
+    session_id: str
+
+class ChatHistoryItem(BaseModel):
+    id: int
+    query: str
+    response: str
+    timestamp: datetime
+
+class ChatHistoryResponse(BaseModel):
+    items: List[ChatHistoryItem]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next (older) page
\ No newline at end of file
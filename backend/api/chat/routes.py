@@ -1,28 +1,105 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 import sys
 import os
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db
+from database import get_async_db
 from chat import models, service
+from chat.log_writer import chat_log_writer
+from ai.rate_limit import upstream_stats
+from ai.retrieval import get_retrieval_stats
 from auth.models import UserResponse
 from utils.auth import get_current_user
+from utils.streaming import sse_events, SSE_MEDIA_TYPE, SSE_HEADERS
 
 router = APIRouter()
 
 @router.post("/", response_model=models.ChatResponse)
 async def chat_with_bot(
     request: models.ChatRequest,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    try:
+        if request.stream:
+            tokens = await service.stream_chat_query(
+                user=current_user,
+                query=request.query,
+                context=request.context,
+                use_cache=not request.bypass_cache,
+                session_id=request.session_id
+            )
+            return StreamingResponse(sse_events(tokens), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+        
+        response = await service.process_chat_query(
+            user=current_user,
+            query=request.query,
+            context=request.context,
+            use_cache=not request.bypass_cache,
+            session_id=request.session_id
+        )
+    except LookupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return {"response": response, "session_id": request.session_id}
+
+@router.post("/sessions", response_model=models.ChatSessionResponse)
+async def create_session(
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    response = service.process_chat_query(
-        db=db,
-        user_id=current_user.id,
-        query=request.query,
-        context=request.context
-    )
-    return {"response": response}
\ No newline at end of file
+    session_id = await service.create_chat_session(db, current_user)
+    return {"session_id": session_id}
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(
+    session_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not await service.delete_chat_session(db, current_user, session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found"
+        )
+
+@router.get("/history", response_model=models.ChatHistoryResponse)
+async def chat_history(
+    limit: int = Query(20, ge=1, le=service.CHAT_HISTORY_MAX_PAGE_SIZE),
+    cursor: str = None,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        logs, next_cursor = await service.get_chat_history(db, current_user.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"items": logs, "next_cursor": next_cursor}
+
+@router.get("/cache/stats")
+async def answer_cache_stats():
+    return service.get_answer_cache_stats()
+
+@router.get("/memory/stats")
+async def memory_stats():
+    return service.get_memory_stats()
+
+@router.get("/retrieval/stats")
+async def retrieval_stats():
+    return get_retrieval_stats()
+
+@router.get("/upstream/stats")
+async def openai_upstream_stats():
+    return upstream_stats()
+
+@router.get("/logs/stats")
+async def chat_log_stats():
+    return chat_log_writer.stats()
\ No newline at end of file
@@ -1,17 +1,34 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+import base64
 import sys
 import os
+from dotenv import load_dotenv
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from chat.answer_cache import CHAT_ANSWER_CACHE_ENABLED, answer_cache, answer_cache_scope
+from chat.log_writer import chat_log_writer
+from chat.memory import SessionWindow, conversation_memory
 from database.models import ChatLog
-from ai.openai_service import get_openai_response
-from database.models import User
+from ai.openai_service import get_openai_response_async, stream_openai_response, is_error_response
+from ai.retrieval import embed_query, retrieve_context
+from auth.models import UserResponse
+from utils.streaming import single_chunk
 
-def process_chat_query(db: Session, user_id: int, query: str, context: str = None):
-    # Get user profile for personalization
-    user = db.query(User).filter(User.id == user_id).first()
+load_dotenv()
+
+CHAT_HISTORY_MAX_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_MAX_PAGE_SIZE", 100))
+
+async def build_chat_prompts(user: UserResponse, query: str, context: str = None, history: str = None):
+    """
+    Build the system and user prompts for a chat query, augmenting any
+    user-selected context with book chunks retrieved for the query and
+    prefixing the conversation history, if any
+    """
+    retrieved_context = await retrieve_context(query)
     
     # Prepare the prompt with user context
     if user:
@@ -31,6 +48,9 @@ def process_chat_query(db: Session, user_id: int, query: str, context: str = Non
         Please provide helpful, accurate responses to questions about the book content.
         """
     
+    # Text the user selected comes first, followed by retrieved chunks
+    context = "\n\n".join(part for part in (context, retrieved_context) if part)
+    
     if context:
         prompt = f"""
         User Question: {query}
@@ -43,16 +63,175 @@ def process_chat_query(db: Session, user_id: int, query: str, context: str = Non
     else:
         prompt = f"User Question: {query}"
     
+    if history:
+        prompt = f"""
+        Conversation So Far:
+        {history}
+        
+        {prompt}
+        """
+    
+    return system_prompt, prompt
+
+def log_chat_interaction(user_id: int, query: str, response: str, window: SessionWindow = None):
+    """
+    Log a chat interaction for analytics. The row is queued and written
+    by the background log writer, off the request path. Turns in a
+    conversation session are also added to its cached history window.
+    """
+    timestamp = datetime.utcnow()
+    session_id = window.session_id if window else None
+    chat_log_writer.enqueue(user_id, query, response, session_id=session_id, timestamp=timestamp)
+    if window is not None and not is_error_response(response):
+        conversation_memory.record_turn(window, query, response, timestamp)
+
+async def get_session_window(user: UserResponse, session_id: str = None):
+    """
+    Return the conversation window for session_id, None when no session
+    was given; raises LookupError for unknown sessions
+    """
+    if not session_id:
+        return None
+    window = await conversation_memory.get_window(session_id, user.id)
+    if window is None:
+        raise LookupError("Chat session not found")
+    return window
+
+async def lookup_cached_answer(user: UserResponse, query: str, context: str = None, use_cache: bool = True):
+    """
+    Look the query up in the semantic answer cache.
+    Returns (answer, cache_slot): answer is None unless there was a hit, and
+    cache_slot is the (scope, embedding) to store a fresh answer under, or
+    None when the cache is disabled or the query could not be embedded.
+    Bypassing the cache skips the lookup but still refreshes the entry.
+    """
+    if not CHAT_ANSWER_CACHE_ENABLED:
+        return None, None
+    try:
+        # The query embedding is cached, so retrieval reuses it
+        embedding = await embed_query(query)
+    except Exception as e:
+        print(f"Answer cache unavailable, could not embed query: {str(e)}")
+        return None, None
+    
+    scope = answer_cache_scope(user, context)
+    if not use_cache:
+        answer_cache.record_bypass()
+        return None, (scope, embedding)
+    
+    cached = answer_cache.lookup(scope, embedding)
+    if cached is not None:
+        return cached.answer, None
+    return None, (scope, embedding)
+
+def store_answer(cache_slot, query: str, answer: str):
+    if cache_slot is not None and not is_error_response(answer):
+        scope, embedding = cache_slot
+        answer_cache.store(scope, embedding, query, answer)
+
+async def _prepare_chat(user: UserResponse, query: str, context: str, use_cache: bool, session_id: str):
+    """
+    Returns (cached_answer, cache_slot, window). Answers in a conversation
+    depend on its history, so sessions never use the answer cache.
+    """
+    window = await get_session_window(user, session_id)
+    if window is not None:
+        return None, None, window
+    cached, cache_slot = await lookup_cached_answer(user, query, context, use_cache)
+    return cached, cache_slot, None
+
+async def process_chat_query(user: UserResponse, query: str, context: str = None,
+                             use_cache: bool = True, session_id: str = None):
+    cached, cache_slot, window = await _prepare_chat(user, query, context, use_cache, session_id)
+    if cached is not None:
+        log_chat_interaction(user.id, query, cached)
+        return cached
+    
+    history = window.prefix() if window else None
+    system_prompt, prompt = await build_chat_prompts(user, query, context, history)
+    
     # Get response from OpenAI
-    response = get_openai_response(system_prompt, prompt)
+    response = await get_openai_response_async(system_prompt, prompt)
+    store_answer(cache_slot, query, response)
     
     # Log the chat interaction
-    chat_log = ChatLog(
-        user_id=user_id,
-        query=query,
-        response=response
-    )
-    db.add(chat_log)
-    db.commit()
-    
-    return response
\ No newline at end of file
+    log_chat_interaction(user.id, query, response, window)
+    
+    return response
+
+async def stream_chat_query(user: UserResponse, query: str, context: str = None,
+                            use_cache: bool = True, session_id: str = None):
+    """
+    Start streaming the chat response, returning an async iterator of tokens.
+    Cached answers are sent in one piece; the interaction is logged once
+    the stream completes.
+    """
+    cached, cache_slot, window = await _prepare_chat(user, query, context, use_cache, session_id)
+    if cached is not None:
+        log_chat_interaction(user.id, query, cached)
+        return single_chunk(cached)
+    
+    history = window.prefix() if window else None
+    system_prompt, prompt = await build_chat_prompts(user, query, context, history)
+    return _stream_and_log(user.id, query, system_prompt, prompt, cache_slot, window)
+
+async def _stream_and_log(user_id: int, query: str, system_prompt: str, prompt: str,
+                          cache_slot=None, window: SessionWindow = None):
+    tokens = []
+    async for token in stream_openai_response(system_prompt, prompt):
+        tokens.append(token)
+        yield token
+    
+    response = "".join(tokens)
+    store_answer(cache_slot, query, response)
+    log_chat_interaction(user_id, query, response, window)
+
+async def create_chat_session(db: AsyncSession, user: UserResponse) -> str:
+    return await conversation_memory.create_session(db, user.id)
+
+async def delete_chat_session(db: AsyncSession, user: UserResponse, session_id: str) -> bool:
+    return await conversation_memory.delete_session(db, session_id, user.id)
+
+def get_memory_stats():
+    return conversation_memory.stats()
+
+def get_answer_cache_stats():
+    return answer_cache.stats()
+
+def encode_history_cursor(timestamp: datetime, log_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_history_cursor(cursor: str):
+    """
+    Decode a history cursor into (timestamp, id); raises ValueError if invalid
+    """
+    try:
+        timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except Exception as e:
+        raise ValueError("Invalid history cursor") from e
+
+async def get_chat_history(db: AsyncSession, user_id: int, limit: int = 20, cursor: str = None):
+    """
+    Return a page of the user's chat history, newest first, and the cursor
+    for the next page. Pages are keyset-paginated on (timestamp, id) so
+    each one is a range scan of the (user_id, timestamp) index, however
+    deep the user pages.
+    """
+    limit = max(1, min(limit, CHAT_HISTORY_MAX_PAGE_SIZE))
+    stmt = select(ChatLog).where(ChatLog.user_id == user_id)
+    if cursor:
+        timestamp, log_id = decode_history_cursor(cursor)
+        stmt = stmt.where(or_(
+            ChatLog.timestamp < timestamp,
+            and_(ChatLog.timestamp == timestamp, ChatLog.id < log_id),
+        ))
+    stmt = stmt.order_by(ChatLog.timestamp.desc(), ChatLog.id.desc()).limit(limit + 1)
+
+    logs = (await db.execute(stmt)).scalars().all()
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_history_cursor(logs[-1].timestamp, logs[-1].id)
+    return logs, next_cursor
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 import sys
 import os
 from dotenv import load_dotenv
@@ -19,8 +19,36 @@ def create_tables():
     """
     engine = create_engine(SQLALCHEMY_DATABASE_URL)
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    create_indexes(engine)
     print("Tables created successfully!")
 
+def add_missing_columns(engine=None):
+    """
+    Add nullable columns that were introduced after a table was created
+    """
+    engine = engine or create_engine(SQLALCHEMY_DATABASE_URL)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                print(f"Added column {table.name}.{column.name}")
+
+def create_indexes(engine=None):
+    """
+    Create any indexes missing from existing tables
+    (create_all only adds indexes when it creates the table)
+    """
+    engine = engine or create_engine(SQLALCHEMY_DATABASE_URL)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 def drop_tables():
     """
     Drop all tables (use with caution!)
@@ -37,7 +65,14 @@ if __name__ == "__main__":
             drop_tables()
         elif sys.argv[1] == "create":
             create_tables()
+        elif sys.argv[1] == "indexes":
+            create_indexes()
+            print("Indexes created successfully!")
+        elif sys.argv[1] == "upgrade":
+            add_missing_columns()
+            create_indexes()
+            print("Database upgraded successfully!")
         else:
-            print("Usage: python migrations.py [create|drop]")
+            print("Usage: python migrations.py [create|drop|indexes|upgrade]")
     else:
         create_tables()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -20,12 +20,73 @@ class User(Base):
 
 class ChatLog(Base):
     __tablename__ = "chat_logs"
+    __table_args__ = (
+        # Serves per-user history pages in timestamp order without a sort
+        Index("ix_chat_logs_user_id_timestamp", "user_id", "timestamp"),
+        # Serves the recent turns of a conversation session
+        Index("ix_chat_logs_session_id_timestamp", "session_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True)
+    user_id = Column(Integer)  # Covered by the (user_id, timestamp) index
+    session_id = Column(String(36), nullable=True)  # Conversation session, if any
     query = Column(Text)
     response = Column(Text)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<ChatLog(id='{self.id}', user_id='{self.user_id}', timestamp='{self.timestamp}')>"
+
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+    
+    id = Column(String(36), primary_key=True)  # uuid4
+    user_id = Column(Integer, index=True)
+    summary = Column(Text, default="")  # Running summary of turns older than the history window
+    summarized_until = Column(DateTime, nullable=True)  # Timestamp of the last turn folded into the summary
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ChatSession(id='{self.id}', user_id='{self.user_id}')>"
+
+class ChunkContent(Base):
+    __tablename__ = "chunk_contents"
+    
+    id = Column(String(36), primary_key=True)  # Vector store point id
+    chapter_id = Column(String, index=True)
+    content_hash = Column(String(64))
+    text = Column(Text)
+    
+    def __repr__(self):
+        return f"<ChunkContent(id='{self.id}', chapter_id='{self.chapter_id}')>"
+
+class TranslationCacheEntry(Base):
+    __tablename__ = "translation_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # sha256 of (text hash, language, model)
+    content_hash = Column(String(64), index=True)
+    target_language = Column(String(16))
+    model = Column(String(64))
+    translated_text = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<TranslationCacheEntry(cache_key='{self.cache_key}', target_language='{self.target_language}')>"
+
+class PersonalizationCacheEntry(Base):
+    __tablename__ = "personalization_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # sha256 of (content hash, profile bucket, model)
+    content_hash = Column(String(64), index=True)
+    software_experience = Column(String(32))
+    hardware_experience = Column(String(32))
+    learning_style = Column(String(32))
+    model = Column(String(64))
+    personalized_content = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed = Column(DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
-        return f"<ChatLog(id='{self.id}', user_id='{self.user_id}', timestamp='{self.timestamp}')>"
\ No newline at end of file
+        return f"<PersonalizationCacheEntry(cache_key='{self.cache_key}', learning_style='{self.learning_style}')>"
\ No newline at end of file
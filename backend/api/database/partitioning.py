@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Monthly range partitioning of the chat_logs table on PostgreSQL.
+
+`convert` rebuilds an existing chat_logs table as a table partitioned by
+month on `timestamp`, copying the rows across and keeping the old table
+as chat_logs_legacy. `ensure` creates partitions for the coming months
+and should run regularly (the retention job calls it). Old months are
+detached or dropped by the retention job rather than deleted row by row.
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+CHAT_LOG_PARTITION_MONTHS_AHEAD = int(os.getenv("CHAT_LOG_PARTITION_MONTHS_AHEAD", 3))
+
+TABLE_NAME = "chat_logs"
+PARTITION_PREFIX = f"{TABLE_NAME}_y"
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}"
+
+def partition_month(name: str):
+    """
+    Parse the month covered by a partition name, or None if it is not a
+    monthly partition (e.g. the default partition)
+    """
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        year, month = name[len(PARTITION_PREFIX):].split("m")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+def is_postgres(engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+def is_partitioned(conn) -> bool:
+    return conn.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :table
+    """), {"table": TABLE_NAME}).first() is not None
+
+def list_partitions(conn) -> list:
+    rows = conn.execute(text("""
+        SELECT child.relname FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE parent.relname = :table
+    """), {"table": TABLE_NAME})
+    return [row[0] for row in rows]
+
+def create_partition(conn, month: date):
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE_NAME} '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+
+def ensure_partitions(conn, months_ahead: int = CHAT_LOG_PARTITION_MONTHS_AHEAD, start: date = None):
+    """
+    Create monthly partitions from `start` (default: this month) through
+    `months_ahead` months from now
+    """
+    current = month_start(datetime.utcnow())
+    month = month_start(start) if start else current
+    last = add_months(current, months_ahead)
+    while month <= last:
+        create_partition(conn, month)
+        month = add_months(month, 1)
+
+def convert_to_partitioned(engine, months_ahead: int = CHAT_LOG_PARTITION_MONTHS_AHEAD):
+    """
+    Rebuild chat_logs as a monthly range-partitioned table
+    """
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            print(f"{TABLE_NAME} is already partitioned")
+            return
+
+        oldest = conn.execute(text(f'SELECT min("timestamp") FROM {TABLE_NAME}')).scalar()
+
+        # Partitioned tables need the partition key in the primary key
+        conn.execute(text(
+            f"CREATE TABLE {TABLE_NAME}_partitioned "
+            f"(LIKE {TABLE_NAME} INCLUDING DEFAULTS) "
+            f'PARTITION BY RANGE ("timestamp")'
+        ))
+        conn.execute(text(f'ALTER TABLE {TABLE_NAME}_partitioned ADD PRIMARY KEY (id, "timestamp")'))
+        conn.execute(text(
+            f"CREATE TABLE {TABLE_NAME}_default PARTITION OF {TABLE_NAME}_partitioned DEFAULT"
+        ))
+
+        conn.execute(text(f"ALTER TABLE {TABLE_NAME} RENAME TO {TABLE_NAME}_legacy"))
+        for index in ("ix_chat_logs_id", "ix_chat_logs_user_id", "ix_chat_logs_user_id_timestamp",
+                      "ix_chat_logs_session_id_timestamp", "ix_chat_logs_timestamp"):
+            conn.execute(text(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_legacy"))
+        conn.execute(text(f"ALTER TABLE {TABLE_NAME}_partitioned RENAME TO {TABLE_NAME}"))
+        conn.execute(text(f'CREATE INDEX ix_chat_logs_user_id_timestamp ON {TABLE_NAME} (user_id, "timestamp")'))
+        conn.execute(text(f'CREATE INDEX ix_chat_logs_session_id_timestamp ON {TABLE_NAME} (session_id, "timestamp")'))
+        conn.execute(text(f"ALTER SEQUENCE IF EXISTS {TABLE_NAME}_id_seq OWNED BY {TABLE_NAME}.id"))
+
+        # Monthly partitions must exist before the rows are copied so they
+        # don't all land in the default partition
+        ensure_partitions(conn, months_ahead, start=oldest)
+        conn.execute(text(f"INSERT INTO {TABLE_NAME} SELECT * FROM {TABLE_NAME}_legacy"))
+
+    print(f"Converted {TABLE_NAME} to monthly partitions; old rows kept in {TABLE_NAME}_legacy")
+
+def main():
+    """Main function to manage chat_logs partitions"""
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the chat_logs table (PostgreSQL only)")
+    parser.add_argument("command", choices=["convert", "ensure"],
+                        help="convert: rebuild chat_logs as a partitioned table; ensure: create upcoming partitions")
+    parser.add_argument("--months-ahead", type=int, default=CHAT_LOG_PARTITION_MONTHS_AHEAD,
+                        help="Number of future monthly partitions to keep created")
+    args = parser.parse_args()
+
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    if not is_postgres(engine):
+        print("Partitioning is only supported on PostgreSQL")
+        return
+
+    if args.command == "convert":
+        convert_to_partitioned(engine, args.months_ahead)
+    else:
+        with engine.begin() as conn:
+            if not is_partitioned(conn):
+                print(f"{TABLE_NAME} is not partitioned; run 'convert' first")
+                return
+            ensure_partitions(conn, args.months_ahead)
+        print("Partitions created successfully!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Retention job for the chat_logs table.
+
+Rows older than CHAT_LOG_COMPACT_AFTER_DAYS are compacted by truncating
+their query/response text to CHAT_LOG_COMPACT_MAX_CHARS, and rows older
+than CHAT_LOG_RETENTION_DAYS are removed. On a partitioned PostgreSQL
+table whole monthly partitions are detached (archived) or dropped, and
+upcoming partitions are created; otherwise rows are deleted in batches.
+Run it daily, e.g. from cron.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, delete, func, select, text, update
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import ChatLog
+from database.partitioning import (
+    TABLE_NAME, add_months, ensure_partitions, is_partitioned, is_postgres,
+    list_partitions, month_start, partition_month,
+)
+
+load_dotenv()
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+CHAT_LOG_RETENTION_DAYS = int(os.getenv("CHAT_LOG_RETENTION_DAYS", 365))
+CHAT_LOG_COMPACT_AFTER_DAYS = int(os.getenv("CHAT_LOG_COMPACT_AFTER_DAYS", 90))
+CHAT_LOG_COMPACT_MAX_CHARS = int(os.getenv("CHAT_LOG_COMPACT_MAX_CHARS", 2000))
+CHAT_LOG_ARCHIVE = os.getenv("CHAT_LOG_ARCHIVE", "false").lower() == "true"
+RETENTION_BATCH_SIZE = 5000
+
+def compact_chat_logs(engine, cutoff: datetime, max_chars: int = CHAT_LOG_COMPACT_MAX_CHARS,
+                      batch_size: int = RETENTION_BATCH_SIZE) -> int:
+    """
+    Truncate the query/response text of rows older than `cutoff`
+    """
+    oversized = (ChatLog.timestamp < cutoff) & (
+        (func.length(ChatLog.response) > max_chars) | (func.length(ChatLog.query) > max_chars)
+    )
+    compacted = 0
+    while True:
+        # Short transactions so the job never holds long row locks
+        with engine.begin() as conn:
+            ids = conn.execute(select(ChatLog.id).where(oversized).limit(batch_size)).scalars().all()
+            if not ids:
+                return compacted
+            conn.execute(
+                update(ChatLog)
+                .where(ChatLog.id.in_(ids), ChatLog.timestamp < cutoff)
+                .values(
+                    query=func.substr(ChatLog.query, 1, max_chars),
+                    response=func.substr(ChatLog.response, 1, max_chars),
+                )
+            )
+        compacted += len(ids)
+
+def delete_chat_logs(engine, cutoff: datetime, batch_size: int = RETENTION_BATCH_SIZE) -> int:
+    """
+    Delete rows older than `cutoff` in batches
+    """
+    deleted = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(ChatLog.id).where(ChatLog.timestamp < cutoff).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return deleted
+            # The timestamp predicate lets partitioned tables prune partitions
+            conn.execute(delete(ChatLog).where(ChatLog.id.in_(ids), ChatLog.timestamp < cutoff))
+        deleted += len(ids)
+
+def expire_partitions(conn, cutoff: datetime, archive: bool = CHAT_LOG_ARCHIVE) -> list:
+    """
+    Detach monthly partitions that end before `cutoff`; detached tables are
+    kept for archiving when `archive` is set, otherwise dropped
+    """
+    expired = []
+    for name in list_partitions(conn):
+        month = partition_month(name)
+        if month is None or add_months(month, 1) > month_start(cutoff):
+            continue
+        conn.execute(text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {name}"))
+        if not archive:
+            conn.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+    return expired
+
+def run_retention(engine, retention_days: int = CHAT_LOG_RETENTION_DAYS,
+                  compact_after_days: int = CHAT_LOG_COMPACT_AFTER_DAYS,
+                  max_chars: int = CHAT_LOG_COMPACT_MAX_CHARS,
+                  archive: bool = CHAT_LOG_ARCHIVE,
+                  batch_size: int = RETENTION_BATCH_SIZE) -> dict:
+    """
+    Compact and expire old chat logs, returning what was done
+    """
+    now = datetime.utcnow()
+    retention_cutoff = now - timedelta(days=retention_days)
+    compact_cutoff = now - timedelta(days=compact_after_days)
+    result = {"partitions_expired": [], "rows_deleted": 0, "rows_compacted": 0}
+
+    partitioned = False
+    if is_postgres(engine):
+        with engine.begin() as conn:
+            partitioned = is_partitioned(conn)
+            if partitioned:
+                ensure_partitions(conn)
+                result["partitions_expired"] = expire_partitions(conn, retention_cutoff, archive)
+
+    # Partitions only expire whole months; the rows in between are deleted
+    result["rows_deleted"] = delete_chat_logs(engine, retention_cutoff, batch_size)
+    result["rows_compacted"] = compact_chat_logs(engine, compact_cutoff, max_chars, batch_size)
+    result["partitioned"] = partitioned
+    return result
+
+def main():
+    """Main function to run the chat log retention job"""
+    parser = argparse.ArgumentParser(description="Compact and expire old chat logs")
+    parser.add_argument("--retention-days", type=int, default=CHAT_LOG_RETENTION_DAYS,
+                        help="Delete chat logs older than this many days")
+    parser.add_argument("--compact-after-days", type=int, default=CHAT_LOG_COMPACT_AFTER_DAYS,
+                        help="Truncate query/response text of chat logs older than this many days")
+    parser.add_argument("--max-chars", type=int, default=CHAT_LOG_COMPACT_MAX_CHARS,
+                        help="Characters kept per field when compacting")
+    parser.add_argument("--archive", action="store_true", default=CHAT_LOG_ARCHIVE,
+                        help="Keep expired partitions as detached tables instead of dropping them")
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE,
+                        help="Rows updated or deleted per transaction")
+    args = parser.parse_args()
+
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    result = run_retention(engine, args.retention_days, args.compact_after_days,
+                           args.max_chars, args.archive, args.batch_size)
+
+    action = "Archived" if args.archive else "Dropped"
+    for name in result["partitions_expired"]:
+        print(f"{action} partition {name}")
+    print(f"Deleted {result['rows_deleted']} chat logs, compacted {result['rows_compacted']}")
+
+if __name__ == "__main__":
+    main()
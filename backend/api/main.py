@@ -1,8 +1,9 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 import os
 import sys
-import os
 
 # Add the current directory to the Python path to fix import issues
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,13 +13,52 @@ from auth.routes import router as auth_router
 from chat.routes import router as chat_router
 from personalization.routes import router as personalization_router
 from translation.routes import router as translation_router
+from ai.openai_service import close_async_client
+from ai.retrieval import warm_retrieval
+from chat.log_writer import chat_log_writer
+from chat.memory import conversation_memory
+from database import async_engine, warm_pool
+from utils.metrics import registry, METRICS_CONTENT_TYPE
+from utils.middleware import HTTP_CACHE_ENABLED, HTTPCacheMiddleware, MetricsMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm shared resources before serving and flush queued work on
+    shutdown; runs in every worker process
+    """
+    # Chat logs are written in batches by a background worker
+    chat_log_writer.start()
+    # Open database connections and load the vector store and BM25 index
+    # before the first request needs them
+    try:
+        await warm_pool()
+    except Exception as e:
+        print(f"Database pool warm-up failed: {str(e)}")
+    await warm_retrieval()
+    
+    yield
+    
+    # The server has already let in-flight requests and streams finish (see
+    # timeout_graceful_shutdown in run_server.py); flush what they queued
+    await conversation_memory.drain()
+    await chat_log_writer.stop()
+    # Release pooled connections held by the async OpenAI client and the database
+    await close_async_client()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="AI Interactive Book API",
     description="Backend API for the AI Interactive Book platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# ETags, 304 Not Modified and compression for complete GET responses
+# (added first so CORS headers are set on its responses too)
+if HTTP_CACHE_ENABLED:
+    app.add_middleware(HTTPCacheMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -26,8 +66,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Trace-Id", "X-Access-Token", "ETag", "X-Artifact-Built-At"],
 )
 
+# Request metrics and per-stage tracing
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(chat_router, prefix="/api/chat", tags=["Chat"])
@@ -38,10 +84,17 @@ app.include_router(translation_router, prefix="/api/translate", tags=["Translati
 async def root():
     return {"message": "AI Interactive Book API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Production launcher with multiple workers (see run_server.py)
+    from run_server import main
+    main()
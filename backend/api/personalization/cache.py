@@ -0,0 +1,87 @@
+import hashlib
+import itertools
+import os
+import sys
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import PersonalizationCacheEntry
+from utils.cache import content_hash
+from utils.metrics import register_cache
+from utils.persistent_cache import TieredCache
+
+load_dotenv()
+
+PERSONALIZATION_CACHE_MAX_ENTRIES = int(os.getenv("PERSONALIZATION_CACHE_MAX_ENTRIES", 2000))
+PERSONALIZATION_CACHE_MAX_CHARS = int(os.getenv("PERSONALIZATION_CACHE_MAX_CHARS", 50_000_000))
+PERSONALIZATION_CACHE_MAX_ROWS = int(os.getenv("PERSONALIZATION_CACHE_MAX_ROWS", 100_000))
+PERSONALIZATION_CACHE_PERSIST = os.getenv("PERSONALIZATION_CACHE_PERSIST", "true").lower() == "true"
+
+EXPERIENCE_LEVELS = ("beginner", "intermediate", "advanced")
+LEARNING_STYLES = ("visual", "auditory", "kinesthetic", "reading/writing")
+
+class ProfileBucket(NamedTuple):
+    """
+    The profile fields that personalization depends on
+    """
+    software_experience: str
+    hardware_experience: str
+    learning_style: str
+
+    @classmethod
+    def from_user(cls, user) -> "ProfileBucket":
+        return cls(
+            _normalize(user.software_experience),
+            _normalize(user.hardware_experience),
+            _normalize(user.learning_style)
+        )
+
+def _normalize(value) -> str:
+    return (value or "").strip().lower()
+
+def all_profile_buckets():
+    """
+    Every combination of experience levels and learning styles
+    """
+    for software, hardware, style in itertools.product(EXPERIENCE_LEVELS, EXPERIENCE_LEVELS, LEARNING_STYLES):
+        yield ProfileBucket(software, hardware, style)
+
+def personalization_cache_key(content: str, bucket: ProfileBucket, model: str):
+    """
+    Build the cache key for personalized content.
+    Returns (cache_key, content_hash).
+    """
+    text_hash = content_hash(content)
+    raw_key = ":".join((text_hash, *bucket, model))
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest(), text_hash
+
+class PersonalizationCache(TieredCache):
+    """
+    Personalized content cache keyed on (content hash, profile bucket, model)
+    """
+
+    def __init__(self):
+        super().__init__(
+            PersonalizationCacheEntry,
+            "personalized_content",
+            max_entries=PERSONALIZATION_CACHE_MAX_ENTRIES,
+            max_size=PERSONALIZATION_CACHE_MAX_CHARS,
+            max_rows=PERSONALIZATION_CACHE_MAX_ROWS,
+            persist=PERSONALIZATION_CACHE_PERSIST,
+            name="Personalization cache"
+        )
+
+    def key_and_fields(self, content: str, bucket: ProfileBucket, model: str):
+        cache_key, text_hash = personalization_cache_key(content, bucket, model)
+        fields = {"content_hash": text_hash, "model": model, **bucket._asdict()}
+        return cache_key, fields
+
+    async def get_or_personalize(self, content: str, bucket: ProfileBucket, model: str, personalize, cacheable=None):
+        cache_key, fields = self.key_and_fields(content, bucket, model)
+        return await self.get_or_compute(cache_key, fields, personalize, cacheable)
+
+personalization_cache = PersonalizationCache()
+register_cache("personalization", personalization_cache.stats)
@@ -1,7 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+from typing import Optional
 
 class PersonalizationRequest(BaseModel):
-    content: str
+    content: str = ""
+    chapter_id: Optional[str] = None  # Personalize a book chapter by id instead of sending its content
+    stream: bool = False  # Stream tokens as server-sent events
+
+    @model_validator(mode="after")
+    def check_source(self):
+        # Exactly one source, so an empty request never reaches the model
+        if bool(self.content.strip()) == bool(self.chapter_id):
+            raise ValueError("Provide exactly one of content or chapter_id")
+        return self
 
 class PersonalizationResponse(BaseModel):
-    personalized_content: str
\ No newline at end of file
+    personalized_content: str
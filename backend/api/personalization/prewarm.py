@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script to pre-warm the personalization cache for every chapter and profile bucket.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the parent directory to the path to import from api module
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.openai_service import close_async_client
+from personalization.cache import all_profile_buckets
+from personalization.service import personalize_for_bucket, get_personalization_cache_stats
+from utils.book import list_chapters, load_chapter
+
+async def prewarm(chapter_ids, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    jobs = [
+        (chapter_id, bucket)
+        for chapter_id in chapter_ids
+        for bucket in all_profile_buckets()
+    ]
+    chapters = {chapter_id: load_chapter(chapter_id) for chapter_id in chapter_ids}
+    done = 0
+    
+    async def run(chapter_id, bucket):
+        nonlocal done
+        async with semaphore:
+            await personalize_for_bucket(bucket, chapters[chapter_id])
+        done += 1
+        print(f"[{done}/{len(jobs)}] {chapter_id} {'/'.join(bucket)}")
+    
+    try:
+        await asyncio.gather(*(run(chapter_id, bucket) for chapter_id, bucket in jobs))
+    finally:
+        await close_async_client()
+
+def main():
+    """Main function to pre-warm the personalization cache."""
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("chapters", nargs="*", help="Chapter ids to pre-warm (default: all chapters)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum concurrent LLM calls")
+    args = parser.parse_args()
+    
+    chapter_ids = args.chapters or list_chapters()
+    missing = [chapter_id for chapter_id in chapter_ids if load_chapter(chapter_id) is None]
+    if missing:
+        print(f"Error: unknown chapters: {', '.join(missing)}")
+        sys.exit(1)
+    
+    print(f"Pre-warming personalization cache for {len(chapter_ids)} chapters...")
+    asyncio.run(prewarm(chapter_ids, args.concurrency))
+    print(f"Done: {get_personalization_cache_stats()}")
+
+if __name__ == "__main__":
+    main()
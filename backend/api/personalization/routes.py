@@ -1,27 +1,89 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 import sys
 import os
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db
+from artifacts.store import ARTIFACT_MAX_AGE, PERSONALIZATION, artifact_store, bucket_variant
 from personalization import models, service
+from personalization.cache import ProfileBucket
 from auth.models import UserResponse
 from utils.auth import get_current_user
+from utils.book import load_chapter
+from utils.http_cache import conditional_response
+from utils.streaming import sse_events, SSE_MEDIA_TYPE, SSE_HEADERS
 
 router = APIRouter()
 
 @router.post("/", response_model=models.PersonalizationResponse)
 async def personalize_content(
     request: models.PersonalizationRequest,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user)
 ):
-    personalized_content = service.personalize_chapter_content(
-        db=db,
-        user_id=current_user.id,
-        content=request.content
+    content = request.content
+    if request.chapter_id:
+        # Chapter sources match the pre-warmed cache entries exactly
+        content = load_chapter(request.chapter_id)
+        if content is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chapter not found"
+            )
+    
+    if request.stream:
+        tokens = await service.stream_personalized_content(
+            user=current_user,
+            content=content
+        )
+        return StreamingResponse(sse_events(tokens), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+    
+    personalized_content = await service.personalize_chapter_content(
+        user=current_user,
+        content=content
     )
-    return {"personalized_content": personalized_content}
\ No newline at end of file
+    return {"personalized_content": personalized_content}
+
+@router.get("/chapters/{chapter_id}")
+async def get_personalized_chapter(
+    chapter_id: str,
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Serve a book chapter personalized for the user's profile as Markdown,
+    from the prebuilt artifacts when they are current
+    """
+    bucket = ProfileBucket.from_user(current_user)
+    # The body depends on who is asking, so only the browser may cache it
+    headers = {"Vary": "Authorization"}
+    artifact = artifact_store.get(PERSONALIZATION, bucket_variant(bucket), chapter_id)
+    if artifact is not None:
+        return conditional_response(
+            request,
+            artifact.body,
+            "text/markdown; charset=utf-8",
+            f"private, max-age={ARTIFACT_MAX_AGE}",
+            etag=artifact.etag,
+            headers={**headers, "X-Artifact-Built-At": artifact.built_at}
+        )
+    
+    content = load_chapter(chapter_id)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chapter not found"
+        )
+    personalized_content = await service.personalize_for_bucket(bucket, content)
+    return conditional_response(
+        request,
+        personalized_content.encode("utf-8"),
+        "text/markdown; charset=utf-8",
+        "private, no-cache",
+        headers=headers
+    )
+
+@router.get("/cache/stats")
+async def personalization_cache_stats():
+    return service.get_personalization_cache_stats()
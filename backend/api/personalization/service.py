@@ -1,24 +1,30 @@
-from sqlalchemy.orm import Session
 import sys
 import os
+from dotenv import load_dotenv
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.models import User
-from ai.openai_service import get_openai_response
+from auth.models import UserResponse
+from ai.openai_service import get_openai_response_async, stream_openai_response, is_error_response
+from personalization.cache import ProfileBucket, personalization_cache
+from utils.streaming import single_chunk
 
-def personalize_chapter_content(db: Session, user_id: int, content: str):
-    # Get user profile for personalization
-    user = db.query(User).filter(User.id == user_id).first()
-    
+load_dotenv()
+
+PERSONALIZATION_MODEL = os.getenv("PERSONALIZATION_MODEL", "gpt-3.5-turbo")
+
+def build_personalization_prompts(bucket: ProfileBucket, content: str):
+    """
+    Build the system and user prompts for personalizing chapter content
+    """
     # Create a prompt for personalizing the content
     system_prompt = f"""
     You are an AI assistant that personalizes educational content based on user profiles.
     The user has the following profile:
-    - Software Experience: {user.software_experience}
-    - Hardware Experience: {user.hardware_experience}
-    - Learning Style: {user.learning_style}
+    - Software Experience: {bucket.software_experience}
+    - Hardware Experience: {bucket.hardware_experience}
+    - Learning Style: {bucket.learning_style}
     
     Please adapt the provided content to better suit this user's profile.
     Make the content more relevant and engaging for them.
@@ -32,7 +38,57 @@ def personalize_chapter_content(db: Session, user_id: int, content: str):
     Adapt the examples, explanations, and tone to match their experience level and learning style.
     """
     
-    # Get personalized content from OpenAI
-    personalized_content = get_openai_response(system_prompt, prompt)
+    return system_prompt, prompt
+
+async def personalize_for_bucket(bucket: ProfileBucket, content: str, model: str = PERSONALIZATION_MODEL):
+    """
+    Personalize content for a profile bucket, served from the cache when possible
+    """
+    system_prompt, prompt = build_personalization_prompts(bucket, content)
+    
+    async def personalize():
+        # Get personalized content from OpenAI
+        return await get_openai_response_async(system_prompt, prompt, model=model)
     
-    return personalized_content
\ No newline at end of file
+    return await personalization_cache.get_or_personalize(
+        content,
+        bucket,
+        model,
+        personalize,
+        cacheable=lambda result: not is_error_response(result)
+    )
+
+async def personalize_chapter_content(user: UserResponse, content: str):
+    bucket = ProfileBucket.from_user(user)
+    return await personalize_for_bucket(bucket, content)
+
+async def stream_personalized_content(user: UserResponse, content: str):
+    """
+    Start streaming personalized content, returning an async iterator of tokens.
+    Cached content is sent in one piece; fresh content is cached once complete.
+    """
+    bucket = ProfileBucket.from_user(user)
+    cache_key, fields = personalization_cache.key_and_fields(content, bucket, PERSONALIZATION_MODEL)
+    
+    cached = personalization_cache.memory.get(cache_key)
+    if cached is None:
+        cached = await personalization_cache.load(cache_key)
+    if cached is not None:
+        return single_chunk(cached)
+    
+    personalization_cache.misses += 1
+    system_prompt, prompt = build_personalization_prompts(bucket, content)
+    return _stream_and_cache(cache_key, fields, system_prompt, prompt)
+
+async def _stream_and_cache(cache_key: str, fields: dict, system_prompt: str, prompt: str):
+    tokens = []
+    async for token in stream_openai_response(system_prompt, prompt, model=PERSONALIZATION_MODEL):
+        tokens.append(token)
+        yield token
+    
+    personalized_content = "".join(tokens)
+    if not is_error_response(personalized_content):
+        await personalization_cache.store(cache_key, fields, personalized_content)
+
+def get_personalization_cache_stats():
+    return personalization_cache.stats()
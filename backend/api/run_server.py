@@ -1,12 +1,86 @@
-import sys
+#!/usr/bin/env python3
+"""
+Script to run the API in production on uvicorn worker processes.
+
+Uses uvloop and httptools when they are installed. Each worker warms its
+database pool, vector store and search index in the app's lifespan before
+serving, and on SIGTERM stops accepting connections and lets in-flight
+requests and streams finish before exiting.
+
+Runs a single worker unless asked for more: conversation windows, the
+answer cache and recent profile changes are held per process, so with
+several workers a follow-up chat turn or a request after a profile update
+can be served from another worker's stale state. OpenAI rate limits,
+circuit breakers and the metrics registry are per process too.
+
+    python run_server.py --port 8000
+    python run_server.py --workers 0  # one per available CPU
+"""
+
+import argparse
+import importlib.util
 import os
+import sys
+from dotenv import load_dotenv
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Now we can import the main app
-from main import app
+def available_cpus() -> int:
+    """
+    CPUs this process may run on, honoring affinity and container CPU quotas
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS or Windows
+        cpus = os.cpu_count() or 1
+    # cgroup v2 quota, e.g. "200000 100000" for two CPUs or "max 100000"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def main():
+    """Main function to run the production server."""
+    load_dotenv()
+    # In-flight requests get this long to finish on shutdown
+    drain_seconds = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", 30))
+
+    parser = argparse.ArgumentParser(description="Run the API on uvicorn worker processes")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="Address to bind")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)), help="Port to bind")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 1)),
+                        help="Worker processes (WEB_CONCURRENCY; 0 for one per available CPU)")
+    parser.add_argument("--drain-timeout", type=float, default=drain_seconds,
+                        help="Seconds in-flight requests get to finish on shutdown (SHUTDOWN_DRAIN_SECONDS)")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"), help="Uvicorn log level")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+
+    workers = args.workers or available_cpus()
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    print(f"Starting {workers} worker(s) on {args.host}:{args.port} (loop={loop}, http={http})")
+
+    # Each worker imports the app itself, so nothing is shared or warmed
+    # in this supervising process
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        proxy_headers=True,
+        timeout_graceful_shutdown=args.drain_timeout,
+        log_level=args.log_level
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat.answer_cache import SemanticAnswerCache
+
+def test_similar_query_in_same_scope_hits():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("scope", [1.0, 0.0, 0.0], "what is rag?", "Retrieval-augmented generation.")
+    hit = cache.lookup("scope", [0.99, 0.05, 0.0])
+    assert hit.answer == "Retrieval-augmented generation."
+    assert cache.lookup("scope", [0.0, 1.0, 0.0]) is None
+    assert cache.lookup("other", [1.0, 0.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+def test_entries_expire_and_evict():
+    cache = SemanticAnswerCache(threshold=0.9, ttl=0.01, max_entries=10, max_entries_per_scope=2)
+    for i, vector in enumerate(([1.0, 0.0], [0.0, 1.0], [1.0, 1.0])):
+        cache.store("scope", vector, f"q{i}", f"a{i}")
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.lookup("scope", [1.0, 0.0]) is None  # Evicted as the oldest in scope
+
+    time.sleep(0.02)
+    assert cache.lookup("scope", [0.0, 1.0]) is None
+    assert len(cache) == 0 and cache.expirations == 2
+
+def test_storing_a_similar_query_replaces_the_old_answer():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("scope", [1.0, 0.0], "what is rag?", "stale")
+    cache.store("scope", [1.0, 0.01], "what is RAG?", "fresh")
+    assert cache.lookup("scope", [1.0, 0.0]).answer == "fresh"
+    assert len(cache) == 1
+
+def test_scope_evicts_least_recently_used():
+    cache = SemanticAnswerCache(threshold=0.9, max_entries_per_scope=2)
+    cache.store("scope", [1.0, 0.0], "q0", "a0")
+    cache.store("scope", [0.0, 1.0], "q1", "a1")
+    assert cache.lookup("scope", [1.0, 0.0]).answer == "a0"
+    cache.store("scope", [-1.0, 0.0], "q2", "a2")
+    assert cache.lookup("scope", [1.0, 0.0]).answer == "a0"
+    assert cache.lookup("scope", [0.0, 1.0]) is None
@@ -0,0 +1,56 @@
+import os
+import sys
+from starlette.requests import Request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artifacts import store
+from artifacts.store import TRANSLATION, ArtifactStore, ArtifactWriter
+from utils.book import chapter_path
+from utils.cache import content_hash
+from utils.http_cache import conditional_response
+
+def make_request(headers=None):
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+def write_chapter(docs, monkeypatch, text):
+    (docs / "intro.md").write_text(text, encoding="utf-8")
+    monkeypatch.setattr(store, "chapter_path", lambda chapter_id: chapter_path(chapter_id, str(docs)))
+
+def test_published_artifact_is_served_until_its_chapter_changes(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    write_chapter(docs, monkeypatch, "# Intro\n")
+
+    writer = ArtifactWriter(str(tmp_path / "artifacts"))
+    writer.write(TRANSLATION, "ur", "intro", content_hash("# Intro\n"), "gpt", "# تعارف\n")
+    writer.publish()
+
+    artifact_store = ArtifactStore(str(tmp_path / "artifacts"))
+    artifact = artifact_store.get(TRANSLATION, "ur", "intro")
+    assert artifact.body.decode("utf-8") == "# تعارف\n"
+    assert ArtifactWriter(str(tmp_path / "artifacts")).is_current(TRANSLATION, "ur", "intro", content_hash("# Intro\n"), "gpt")
+    assert artifact_store.get(TRANSLATION, "fr", "intro") is None
+
+    os.utime(docs / "intro.md", (1, 1))
+    write_chapter(docs, monkeypatch, "# Introduction\n")
+    assert artifact_store.get(TRANSLATION, "ur", "intro") is None
+
+def test_publish_prunes_replaced_artifacts(tmp_path):
+    writer = ArtifactWriter(str(tmp_path))
+    writer.write(TRANSLATION, "ur", "intro", "h1", "gpt", "old")
+    writer.publish()
+    writer.write(TRANSLATION, "ur", "intro", "h2", "gpt", "new")
+    assert writer.publish() == 1
+    assert len(os.listdir(tmp_path / TRANSLATION / "ur")) == 1
+
+def test_conditional_response_returns_not_modified_for_matching_etag():
+    response = conditional_response(make_request(), b"body", "text/plain", "public, max-age=60")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+
+    cached = conditional_response(make_request({"If-None-Match": f'W/{etag}, "other"'}), b"body", "text/plain", "public, max-age=60")
+    assert cached.status_code == 304
+    assert cached.body == b""
+    assert cached.headers["cache-control"] == "public, max-age=60"
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+from jose import jwt
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.cache import invalidate_user, token_cache, user_cache
+from auth.models import UserResponse
+from utils.auth import ALGORITHM, SECRET_KEY, _authenticate, create_access_token, create_user_access_token
+
+class NoDatabase:
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("token with profile claims should not hit the database")
+
+def make_user(email="reader@example.com", learning_style="visual"):
+    return UserResponse(
+        id=7, email=email, software_experience="beginner", hardware_experience="advanced",
+        learning_style=learning_style, created_at=datetime(2024, 1, 1)
+    )
+
+def test_profile_claims_authenticate_without_database():
+    token_cache.clear()
+    user = make_user()
+    token = create_user_access_token(user)
+    assert asyncio.run(_authenticate(token, NoDatabase())) == user
+    # The second request is served from the verified-token cache
+    hits = token_cache.hits
+    assert asyncio.run(_authenticate(token, NoDatabase())) == user
+    assert token_cache.hits == hits + 1
+
+def test_profile_change_makes_older_tokens_fall_back():
+    token_cache.clear()
+    user = make_user(email="changed@example.com")
+    token = create_user_access_token(user)
+    assert asyncio.run(_authenticate(token, NoDatabase())) == user
+
+    updated = make_user(email="changed@example.com", learning_style="textual")
+    invalidate_user(updated.email)
+    user_cache.set(updated.email, updated)
+    assert asyncio.run(_authenticate(token, NoDatabase())) == updated
+
+def test_tokens_without_claims_use_profile_cache():
+    token_cache.clear()
+    user = make_user(email="legacy@example.com")
+    user_cache.set(user.email, user)
+    token = create_access_token(data={"sub": user.email})
+    assert asyncio.run(_authenticate(token, NoDatabase())) == user
+
+def test_token_minted_after_profile_change_uses_its_claims():
+    token_cache.clear()
+    updated = make_user(email="fresh@example.com", learning_style="textual")
+    invalidate_user(updated.email)
+    token = create_user_access_token(updated)
+    assert asyncio.run(_authenticate(token, NoDatabase())) == updated
+
+def test_token_without_expiry_is_accepted():
+    token_cache.clear()
+    user = make_user(email="noexp@example.com")
+    user_cache.set(user.email, user)
+    token = jwt.encode({"sub": user.email}, SECRET_KEY, algorithm=ALGORITHM)
+    assert asyncio.run(_authenticate(token, NoDatabase())) == user
+    assert asyncio.run(_authenticate(token, NoDatabase())) == user
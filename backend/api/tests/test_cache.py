@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import LRUCache, SingleFlight, content_hash
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert "b" not in cache
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.evictions == 1
+
+def test_lru_respects_size_bound():
+    cache = LRUCache(max_entries=10, max_size=5)
+    cache.set("a", "abc")
+    cache.set("b", "de")
+    cache.set("c", "f")
+    assert "a" not in cache
+    assert cache.size == 3
+    cache.set("d", "too large")
+    assert "d" not in cache
+
+def test_content_hash_ignores_whitespace_noise():
+    assert content_hash("Hello   world\r\n") == content_hash("Hello world")
+    assert content_hash("Hello world") != content_hash("Hello, world")
+
+def test_single_flight_coalesces_concurrent_calls():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(run())
+    assert results == ["done"] * 5
+    assert len(calls) == 1
+    assert flight.coalesced == 4
+
+def test_lru_entries_expire_after_ttl():
+    cache = LRUCache(max_entries=10, ttl=0.01)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    time.sleep(0.02)
+    assert "a" not in cache
+    assert cache.get("a") is None
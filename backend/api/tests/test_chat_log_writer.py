@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from chat.log_writer import ChatLogWriter
+from database.models import Base, ChatLog
+
+async def _session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'logs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+async def _count_logs(session_factory):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(ChatLog))
+
+def test_writer_batches_and_drains_on_stop(tmp_path):
+    async def run():
+        engine, session_factory = await _session_factory(tmp_path)
+        writer = ChatLogWriter(session_factory, batch_size=10, flush_interval_ms=1000)
+        writer.start()
+        for i in range(25):
+            assert writer.enqueue(1, f"q{i}", f"a{i}")
+        await writer.stop()
+        count = await _count_logs(session_factory)
+        await engine.dispose()
+        return writer, count
+
+    writer, count = asyncio.run(run())
+    assert count == 25
+    assert writer.written == 25 and writer.batches == 3
+    assert writer.dropped == 0 and writer.stats()["pending"] == 0
+
+def test_writer_drops_when_queue_is_full(tmp_path):
+    async def run():
+        engine, session_factory = await _session_factory(tmp_path)
+        writer = ChatLogWriter(session_factory, max_queue_size=2)
+        accepted = [writer.enqueue(1, "q", "a") for _ in range(4)]
+        await writer.stop()
+        assert not writer.enqueue(1, "late", "a")
+        count = await _count_logs(session_factory)
+        await engine.dispose()
+        return writer, accepted, count
+
+    writer, accepted, count = asyncio.run(run())
+    assert accepted == [True, True, False, False]
+    assert count == 2
+    assert writer.dropped == 3
@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.chunker import chunk_markdown
+from ai.populate_qdrant import build_chunks
+
+CHAPTER = """---
+sidebar_position: 1
+---
+
+# Chapter
+
+## Section A
+
+First paragraph of section A.
+
+```python
+print("kept whole")
+```
+
+## Section B
+
+""" + " ".join(f"Sentence {i} of a long paragraph." for i in range(100)) + "\n"
+
+def test_chunks_follow_sections_and_carry_metadata():
+    chunks = list(chunk_markdown(CHAPTER, "chapter-x", max_tokens=1000))
+    assert [chunk["heading_path"] for chunk in chunks] == [
+        ["Chapter", "Section A"],
+        ["Chapter", "Section B"],
+    ]
+    first = chunks[0]
+    assert first["chapter_id"] == "chapter-x"
+    assert first["text"].startswith("## Section A\n\nFirst paragraph")
+    assert 'print("kept whole")' in first["text"]
+    assert CHAPTER[first["start_offset"]:first["end_offset"]].startswith("First paragraph")
+    assert CHAPTER[first["start_offset"]:first["end_offset"]].endswith("```")
+
+def test_oversized_paragraphs_are_split_within_budget():
+    chunks = list(chunk_markdown(CHAPTER, "chapter-x", max_tokens=100))
+    section_b = [chunk for chunk in chunks if chunk["heading_path"][-1] == "Section B"]
+    assert len(section_b) > 1
+    assert all(chunk["token_count"] <= 100 for chunk in chunks)
+    assert all(chunk["text"].startswith("## Section B") for chunk in section_b)
+    assert [chunk["chunk_index"] for chunk in chunks] == list(range(len(chunks)))
+
+def test_identical_sections_get_distinct_point_ids():
+    exercise = "## Exercise\n\nTry it yourself.\n\n"
+    records = build_chunks({"chapter-x": "# Chapter\n\n" + exercise * 2})
+    assert len(records) == 2
+    assert records[0]["payload"]["content_hash"] == records[1]["payload"]["content_hash"]
+    assert records[0]["id"] != records[1]["id"]
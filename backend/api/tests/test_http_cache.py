@@ -0,0 +1,59 @@
+import os
+import sys
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.middleware import HTTPCacheMiddleware, accepted_encodings
+
+BODY = "A chapter paragraph. " * 200
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(HTTPCacheMiddleware, policies=(("/chapter", "public, max-age=60", ()),))
+
+    @app.get("/chapter")
+    async def chapter():
+        return PlainTextResponse(BODY)
+
+    @app.get("/events")
+    async def events():
+        async def tokens():
+            yield "data: a\n\n"
+            yield "data: b\n\n"
+        return StreamingResponse(tokens(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+def test_complete_responses_get_etag_policy_and_not_modified():
+    client = make_client()
+    response = client.get("/chapter", headers={"Accept-Encoding": "identity"})
+    assert response.text == BODY
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert "content-encoding" not in response.headers
+
+    cached = client.get("/chapter", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+def test_large_bodies_are_gzipped_with_their_own_etag():
+    client = make_client()
+    plain = client.get("/chapter", headers={"Accept-Encoding": "identity"})
+    response = client.get("/chapter", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert "Accept-Encoding" in response.headers["vary"]
+    # A client holding the gzip representation revalidates too
+    assert client.get("/chapter", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+def test_streamed_responses_pass_through():
+    response = make_client().get("/events", headers={"Accept-Encoding": "gzip"})
+    assert response.text == "data: a\n\ndata: b\n\n"
+    assert "etag" not in response.headers
+    assert "content-encoding" not in response.headers
+
+def test_accepted_encodings_skip_refused_codings():
+    assert accepted_encodings("gzip;q=0.5, br;q=0, deflate") == {"gzip", "deflate"}
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai import retrieval
+from ai.lexical_index import BM25Index, index_terms, reciprocal_rank_fusion
+from ai.vector_store import SearchResult
+
+RECORDS = [
+    {"id": "a", "payload": {"text": "Predictive analytics forecasts which students need help."}},
+    {"id": "b", "payload": {"text": "Analytics dashboards are predictive of nothing; they describe the past."}},
+    {"id": "c", "payload": {"text": "Intelligent tutoring systems adapt lessons to each learner."}},
+]
+
+def test_index_terms_drop_stopwords_and_add_phrases():
+    assert index_terms("What is predictive analytics?") == ["predictive", "analytics", "predictive analytics"]
+
+def test_bm25_ranks_exact_phrase_first():
+    index = BM25Index(RECORDS)
+    results = index.search("predictive analytics", limit=3)
+    assert [result.id for result in results] == ["a", "b"]
+    assert index.search("quantum chromodynamics") == []
+
+def test_bm25_needs_most_query_words():
+    index = BM25Index(RECORDS)
+    assert index.search("write a poem about tutoring") == []
+    assert [result.id for result in index.search("tutoring systems poem")] == ["c"]
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [SearchResult("x", 0.9, {}), SearchResult("y", 0.8, {})]
+    lexical = [SearchResult("y", 7.0, {}), SearchResult("z", 3.0, {})]
+    assert [result.id for result in reciprocal_rank_fusion([dense, lexical], limit=3)] == ["y", "x", "z"]
+
+def test_hybrid_falls_back_to_lexical_when_vector_search_is_slow(monkeypatch):
+    async def slow_vector_search(query, limit, score_threshold):
+        await asyncio.sleep(1)
+        return []
+
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MODE", "hybrid")
+    monkeypatch.setattr(retrieval, "RAG_VECTOR_TIMEOUT_MS", 10)
+    monkeypatch.setattr(retrieval, "get_lexical_index", lambda: BM25Index(RECORDS))
+    monkeypatch.setattr(retrieval, "vector_search", slow_vector_search)
+    results = asyncio.run(retrieval.retrieve_chunks("intelligent tutoring"))
+    assert [result.id for result in results] == ["c"]
+
+def test_hybrid_skips_keyword_matches_when_nothing_is_relevant(monkeypatch):
+    async def no_vector_results(query, limit, score_threshold):
+        return []
+
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MODE", "hybrid")
+    monkeypatch.setattr(retrieval, "get_lexical_index", lambda: BM25Index(RECORDS))
+    monkeypatch.setattr(retrieval, "vector_search", no_vector_results)
+    assert asyncio.run(retrieval.retrieve_chunks("intelligent tutoring")) == []
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.local_vector_store import LocalVectorStore
+
+POINTS = [
+    {"id": "a", "vector": [1.0, 0.0, 0.0], "payload": {"text": "alpha", "content_hash": "ha"}},
+    {"id": "b", "vector": [0.0, 2.0, 0.0], "payload": {"text": "beta", "content_hash": "hb"}},
+    {"id": "c", "vector": [1.0, 1.0, 0.0], "payload": {"text": "gamma", "content_hash": "hc"}},
+]
+
+def test_search_ranks_by_cosine_similarity(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    asyncio.run(store.upsert(POINTS))
+    results = asyncio.run(store.search([1.0, 0.1, 0.0], limit=2))
+    assert [result.id for result in results] == ["a", "c"]
+    assert results[0].payload["text"] == "alpha"
+    assert asyncio.run(store.search([1.0, 0.0, 0.0], limit=3, score_threshold=0.5))[-1].id == "c"
+
+def test_index_persists_and_supports_updates_and_deletes(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    asyncio.run(store.upsert(POINTS))
+    asyncio.run(store.upsert([{"id": "b", "vector": [0.0, 0.0, 1.0], "payload": {"text": "beta2"}}]))
+    asyncio.run(store.delete(["a"]))
+
+    reopened = LocalVectorStore(str(tmp_path))
+    assert sorted(reopened.ids) == ["b", "c"]
+    results = asyncio.run(reopened.search([0.0, 0.0, 1.0], limit=1))
+    assert results[0].id == "b" and results[0].payload["text"] == "beta2"
+
+def test_repeated_id_in_one_batch_keeps_the_last_copy(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    asyncio.run(store.upsert([
+        {"id": "a", "vector": [1.0, 0.0, 0.0], "payload": {"text": "first"}},
+        {"id": "a", "vector": [0.0, 1.0, 0.0], "payload": {"text": "second"}},
+    ]))
+    assert store.ids == ["a"]
+    results = asyncio.run(store.search([0.0, 1.0, 0.0], limit=1))
+    assert results[0].payload["text"] == "second" and results[0].score > 0.99
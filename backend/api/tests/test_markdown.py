@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation import service
+from utils.markdown import split_markdown_blocks, join_markdown_blocks
+
+SAMPLE = """---
+sidebar_position: 2
+---
+
+import Widget from '@site/src/components/Widget';
+
+# Chapter Title
+
+<Widget />
+
+Intro paragraph
+spanning two lines.
+
+```python
+# not a heading
+
+print("hi")
+```
+## Next Section
+Body text.
+"""
+
+def test_blocks_round_trip_exactly():
+    assert join_markdown_blocks(split_markdown_blocks(SAMPLE)) == SAMPLE
+
+def test_only_headings_and_paragraphs_are_translatable():
+    blocks = split_markdown_blocks(SAMPLE)
+    translatable = [(block.kind, block.body) for block in blocks if block.translatable]
+    assert translatable == [
+        ("heading", "Chapter Title"),
+        ("paragraph", "Intro paragraph\nspanning two lines."),
+        ("heading", "Next Section"),
+        ("paragraph", "Body text."),
+    ]
+    code = [block for block in blocks if block.kind == "code"]
+    assert len(code) == 1 and "# not a heading" in code[0].text
+
+def test_translated_blocks_keep_their_indentation(monkeypatch):
+    async def upper(text, target_language):
+        return text.strip().upper() + "\n"
+
+    monkeypatch.setattr(service, "translate_content", upper)
+    result = asyncio.run(service.translate_chapter("- item\n\n    continued text\n"))
+    assert result["translated_content"] == "- ITEM\n\n    CONTINUED TEXT\n"
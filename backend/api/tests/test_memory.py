@@ -0,0 +1,26 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat.memory import SessionWindow
+from utils.tokens import count_tokens
+
+def test_window_keeps_latest_turns_within_budget():
+    turn_tokens = count_tokens("User: question 0\nAssistant: answer 0")
+    window = SessionWindow("s", 1, token_budget=2 * turn_tokens)
+    for i in range(4):
+        window.add_turn(f"question {i}", f"answer {i}", datetime.utcnow())
+
+    assert [turn.query for turn in window.turns] == ["question 2", "question 3"]
+    assert [turn.query for turn in window.overflow] == ["question 0", "question 1"]
+    assert window.prefix().startswith("User: question 2")
+
+    # The summary counts towards the budget, pushing out another turn
+    window.set_summary("asked two questions", 2)
+    assert [turn.query for turn in window.overflow] == ["question 2"]
+    assert window.prefix() == (
+        "Summary of earlier conversation: asked two questions\n\n"
+        "User: question 3\nAssistant: answer 3"
+    )
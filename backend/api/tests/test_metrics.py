@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import MetricsRegistry
+from utils.tracing import current_trace, span, start_trace
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5, route="/a")
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    requests.inc(route='/"b"')
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert 'requests_total{route="/\\"b\\""} 1' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+
+def test_trace_accumulates_repeated_stages():
+    trace = start_trace("abc")
+    with span("db"):
+        pass
+    with span("db"):
+        pass
+    with span("llm"):
+        pass
+    assert current_trace() is trace
+    assert trace.spans["db"][1] == 2
+    assert trace.server_timing().startswith('db;dur=')
+    assert 'desc="2x"' in trace.server_timing() and "llm;dur=" in trace.server_timing()
@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+from pydantic import ValidationError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personalization.models import PersonalizationRequest
+
+def test_request_needs_exactly_one_source():
+    assert PersonalizationRequest(content="Some text").content == "Some text"
+    assert PersonalizationRequest(chapter_id="intro").chapter_id == "intro"
+    for fields in ({}, {"content": "  "}, {"content": "Some text", "chapter_id": "intro"}):
+        with pytest.raises(ValidationError):
+            PersonalizationRequest(**fields)
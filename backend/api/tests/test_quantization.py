@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from ai import content_store
+from ai.local_vector_store import LocalVectorStore
+from ai.quantization import ProductQuantizer, ScalarQuantizer
+from ai.vector_store import SearchResult
+
+def random_points(count=300, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return [{"id": str(row), "vector": vector.tolist(), "payload": {"row": row}} for row, vector in enumerate(vectors)]
+
+def test_scalar_scores_track_exact_scores():
+    matrix = np.random.default_rng(1).standard_normal((200, 32)).astype(np.float32)
+    quantizer = ScalarQuantizer.fit(matrix)
+    query = matrix[0]
+    approximate = quantizer.scores(quantizer.encode(matrix), query)
+    assert np.allclose(approximate, matrix @ query, atol=0.1)
+
+def test_product_codes_are_compact():
+    matrix = np.random.default_rng(2).standard_normal((300, 32)).astype(np.float32)
+    quantizer = ProductQuantizer.fit(matrix, subvector_dim=8)
+    codes = quantizer.encode(matrix)
+    assert codes.dtype == np.uint8 and codes.shape == (4, 300)
+    assert np.argmax(quantizer.scores(codes, matrix[5])) == 5
+
+def test_quantized_store_rescores_to_exact_results(tmp_path):
+    points = random_points()
+    exact = LocalVectorStore(str(tmp_path / "exact"))
+    quantized = LocalVectorStore(str(tmp_path / "int8"), quantization="scalar", oversampling=4)
+    asyncio.run(exact.upsert(points))
+    asyncio.run(quantized.upsert(points))
+
+    query = points[7]["vector"]
+    expected = asyncio.run(exact.search(query, limit=5))
+    results = asyncio.run(quantized.search(query, limit=5))
+    assert [result.id for result in results] == [result.id for result in expected]
+    assert np.allclose([result.score for result in results], [result.score for result in expected])
+
+    # Codes persist alongside the float vectors
+    reopened = LocalVectorStore(str(tmp_path / "int8"), quantization="none")
+    assert reopened.codes is not None and reopened.codes.dtype == np.int8
+    assert asyncio.run(reopened.search(query, limit=1))[0].id == "7"
+
+def test_hydrate_fills_missing_texts(monkeypatch):
+    async def fake_load_texts(point_ids):
+        return {point_id: f"text of {point_id}" for point_id in point_ids}
+
+    monkeypatch.setattr(content_store, "load_texts", fake_load_texts)
+    results = [SearchResult("a", 0.9, {"chapter_id": "intro"}), SearchResult("b", 0.8, {"text": "inline"})]
+    hydrated = asyncio.run(content_store.hydrate_texts(results))
+    assert [result.payload["text"] for result in hydrated] == ["text of a", "inline"]
+    assert hydrated[0].payload["chapter_id"] == "intro"
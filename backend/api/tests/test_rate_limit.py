@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+from ai import rate_limit
+from ai.rate_limit import CircuitBreaker, CircuitOpenError, ModelLimits, TokenBucket, UpstreamGuard, retry_after_seconds
+
+def scripted(*responses):
+    """
+    A send() that returns the given status codes (or raises exceptions) in turn
+    """
+    calls = []
+    request = httpx.Request("POST", "http://upstream/chat/completions")
+
+    async def send():
+        item = responses[len(calls)]
+        calls.append(item)
+        if isinstance(item, Exception):
+            raise item
+        status, headers = item if isinstance(item, tuple) else (item, {})
+        return httpx.Response(status, headers=headers, json={"ok": True}, request=request)
+
+    return send, calls
+
+def make_guard(**overrides):
+    settings = dict(max_retries=3, failure_threshold=3, reset_seconds=60)
+    settings.update(overrides)
+    return UpstreamGuard("test-model", ModelLimits(**settings))
+
+async def use(guard, send):
+    async with guard.request(send) as response:
+        return response.json()
+
+def test_retries_honor_retry_after_and_throttle():
+    send, calls = scripted((429, {"retry-after-ms": "10"}), 200)
+    guard = make_guard(requests_per_minute=600)
+    assert asyncio.run(use(guard, send)) == {"ok": True}
+    assert len(calls) == 2
+    # The rate limit response halved the request rate
+    assert guard.requests.rate < guard.requests.max_rate
+
+def test_client_errors_are_not_retried():
+    send, calls = scripted(400, 200)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(use(make_guard(), send))
+    assert len(calls) == 1
+
+def test_circuit_opens_after_repeated_failures(monkeypatch):
+    monkeypatch.setattr(rate_limit, "backoff_seconds", lambda attempt: 0)
+    timeout = httpx.ConnectTimeout("timed out")
+    send, calls = scripted(timeout, timeout, timeout, 200)
+    guard = make_guard(max_retries=5)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(use(guard, send))
+    assert len(calls) == 3
+    assert guard.breaker.state == "open"
+
+def test_circuit_lets_one_trial_through_after_reset():
+    breaker = CircuitBreaker("test-model", failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.opened_at -= 60
+    breaker.check()  # the trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_token_bucket_delays_beyond_burst():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0
+    assert bucket.wait_time(1) == pytest.approx(1, rel=0.1)
+
+def test_retry_after_parsing():
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after": "2"})) == 2
+    assert retry_after_seconds(httpx.Response(429)) is None
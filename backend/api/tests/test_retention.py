@@ -0,0 +1,35 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+
+from database.models import Base, ChatLog
+from database.partitioning import add_months, partition_month, partition_name
+from database.retention import run_retention
+
+def test_retention_compacts_and_deletes_old_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(ChatLog.__table__.insert(), [
+            {"user_id": 1, "query": "old", "response": "x" * 50, "timestamp": now - timedelta(days=400)},
+            {"user_id": 1, "query": "stale", "response": "y" * 50, "timestamp": now - timedelta(days=100)},
+            {"user_id": 1, "query": "new", "response": "z" * 50, "timestamp": now},
+        ])
+
+    result = run_retention(engine, retention_days=365, compact_after_days=90, max_chars=10, batch_size=1)
+
+    assert result["rows_deleted"] == 1 and result["rows_compacted"] == 1
+    with engine.connect() as conn:
+        rows = {row.query: row.response for row in conn.execute(select(ChatLog.query, ChatLog.response))}
+    assert rows == {"stale": "y" * 10, "new": "z" * 50}
+
+def test_partition_names_round_trip():
+    month = add_months(datetime(2025, 11, 1).date(), 2)
+    assert partition_name(month) == "chat_logs_y2026m01"
+    assert partition_month(partition_name(month)) == month
+    assert partition_month("chat_logs_default") is None
@@ -0,0 +1,9 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_server import available_cpus
+
+def test_available_cpus_is_positive():
+    assert available_cpus() >= 1
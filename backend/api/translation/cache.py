@@ -0,0 +1,56 @@
+import hashlib
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import TranslationCacheEntry
+from utils.cache import content_hash
+from utils.metrics import register_cache
+from utils.persistent_cache import TieredCache
+
+load_dotenv()
+
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", 5000))
+TRANSLATION_CACHE_MAX_CHARS = int(os.getenv("TRANSLATION_CACHE_MAX_CHARS", 20_000_000))
+TRANSLATION_CACHE_MAX_ROWS = int(os.getenv("TRANSLATION_CACHE_MAX_ROWS", 200_000))
+TRANSLATION_CACHE_PERSIST = os.getenv("TRANSLATION_CACHE_PERSIST", "true").lower() == "true"
+
+def translation_cache_key(text: str, target_language: str, model: str):
+    """
+    Build the content-addressed cache key for a translation.
+    Returns (cache_key, content_hash).
+    """
+    text_hash = content_hash(text)
+    cache_key = hashlib.sha256(f"{text_hash}:{target_language}:{model}".encode("utf-8")).hexdigest()
+    return cache_key, text_hash
+
+class TranslationCache(TieredCache):
+    """
+    Content-addressed translation cache keyed on (text hash, language, model)
+    """
+
+    def __init__(self):
+        super().__init__(
+            TranslationCacheEntry,
+            "translated_text",
+            max_entries=TRANSLATION_CACHE_MAX_ENTRIES,
+            max_size=TRANSLATION_CACHE_MAX_CHARS,
+            max_rows=TRANSLATION_CACHE_MAX_ROWS,
+            persist=TRANSLATION_CACHE_PERSIST,
+            name="Translation cache"
+        )
+
+    async def get_or_translate(self, text: str, target_language: str, model: str, translate, cacheable=None):
+        cache_key, text_hash = translation_cache_key(text, target_language, model)
+        fields = {
+            "content_hash": text_hash,
+            "target_language": target_language,
+            "model": model
+        }
+        return await self.get_or_compute(cache_key, fields, translate, cacheable)
+
+translation_cache = TranslationCache()
+register_cache("translation", translation_cache.stats)
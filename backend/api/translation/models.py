@@ -5,4 +5,13 @@ class TranslationRequest(BaseModel):
     target_language: str = "ur"  # Default to Urdu
 
 class TranslationResponse(BaseModel):
-    translated_text: str
\ No newline at end of file
+    translated_text: str
+
+class ChapterTranslationRequest(BaseModel):
+    content: str  # Full Markdown/MDX chapter
+    target_language: str = "ur"  # Default to Urdu
+
+class ChapterTranslationResponse(BaseModel):
+    translated_content: str
+    total_blocks: int
+    translated_blocks: int  # Headings and paragraphs sent through translation
@@ -1,18 +1,70 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request, status
 import sys
 import os
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from artifacts.store import ARTIFACT_MAX_AGE, TRANSLATION, artifact_store
 from translation import models, service
+from utils.book import load_chapter
+from utils.http_cache import conditional_response
+
+MARKDOWN_MEDIA_TYPE = "text/markdown; charset=utf-8"
 
 router = APIRouter()
 
 @router.post("/", response_model=models.TranslationResponse)
 async def translate_text(request: models.TranslationRequest):
-    translated_text = service.translate_content(
+    translated_text = await service.translate_content(
         text=request.text,
         target_language=request.target_language
     )
-    return {"translated_text": translated_text}
\ No newline at end of file
+    return {"translated_text": translated_text}
+
+@router.post("/chapter", response_model=models.ChapterTranslationResponse)
+async def translate_chapter(request: models.ChapterTranslationRequest):
+    return await service.translate_chapter(
+        content=request.content,
+        target_language=request.target_language
+    )
+
+@router.get("/chapters/{chapter_id}")
+async def get_chapter_translation(chapter_id: str, request: Request, target_language: str = "ur"):
+    """
+    Serve a book chapter's translation as Markdown, from the prebuilt
+    artifacts when they are current (see artifacts/build.py)
+    """
+    artifact = artifact_store.get(TRANSLATION, target_language, chapter_id)
+    if artifact is not None:
+        return conditional_response(
+            request,
+            artifact.body,
+            MARKDOWN_MEDIA_TYPE,
+            f"public, max-age={ARTIFACT_MAX_AGE}",
+            etag=artifact.etag,
+            headers={"X-Artifact-Built-At": artifact.built_at}
+        )
+    
+    content = load_chapter(chapter_id)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chapter not found"
+        )
+    # Not built yet: translate live, which is only as cached as its blocks
+    result = await service.translate_chapter(content=content, target_language=target_language)
+    return conditional_response(
+        request,
+        result["translated_content"].encode("utf-8"),
+        MARKDOWN_MEDIA_TYPE,
+        "no-cache"
+    )
+
+@router.get("/artifacts/stats")
+async def translation_artifact_stats():
+    return artifact_store.stats()
+
+@router.get("/cache/stats")
+async def translation_cache_stats():
+    return service.get_translation_cache_stats()
@@ -1,12 +1,21 @@
+import asyncio
 import sys
 import os
+from dotenv import load_dotenv
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai.openai_service import get_openai_response
+from ai.openai_service import get_openai_response_async, is_error_response
+from translation.cache import translation_cache
+from utils.markdown import split_markdown_blocks
 
-def translate_content(text: str, target_language: str = "ur"):
+load_dotenv()
+
+TRANSLATION_MODEL = os.getenv("TRANSLATION_MODEL", "gpt-3.5-turbo")
+CHAPTER_TRANSLATION_CONCURRENCY = int(os.getenv("CHAPTER_TRANSLATION_CONCURRENCY", 8))
+
+async def translate_content(text: str, target_language: str = "ur"):
     # Map language codes to full names
     language_map = {
         "ur": "Urdu",
@@ -30,7 +39,50 @@ def translate_content(text: str, target_language: str = "ur"):
     {text}
     """
     
-    # Get translated content from OpenAI
-    translated_text = get_openai_response(system_prompt, prompt)
+    async def translate():
+        # Get translated content from OpenAI
+        return await get_openai_response_async(system_prompt, prompt, model=TRANSLATION_MODEL)
+    
+    # Identical text is only translated once per language and model;
+    # failed upstream calls are returned but never cached
+    translated_text = await translation_cache.get_or_translate(
+        text,
+        target_language_name,
+        TRANSLATION_MODEL,
+        translate,
+        cacheable=lambda result: not is_error_response(result)
+    )
+    
+    return translated_text
+
+async def translate_chapter(content: str, target_language: str = "ur"):
+    """
+    Translate a Markdown chapter block by block.
+
+    Headings and paragraphs are translated concurrently while code fences,
+    front matter and MDX lines are kept verbatim. Because each block goes
+    through the content-addressed translation cache, re-translating an
+    edited chapter only calls the model for blocks whose content changed.
+    """
+    blocks = split_markdown_blocks(content)
+    semaphore = asyncio.Semaphore(CHAPTER_TRANSLATION_CONCURRENCY)
+    
+    async def translate_block(block):
+        if not block.translatable:
+            return block.text
+        async with semaphore:
+            translated = await translate_content(block.body, target_language)
+        # Keep the block's own indentation (nested list items, continuations)
+        indent = block.body[:len(block.body) - len(block.body.lstrip())]
+        return block.prefix + indent + translated.strip() + block.suffix
     
-    return translated_text
\ No newline at end of file
+    parts = await asyncio.gather(*(translate_block(block) for block in blocks))
+    
+    return {
+        "translated_content": "".join(parts),
+        "total_blocks": len(blocks),
+        "translated_blocks": sum(1 for block in blocks if block.translatable)
+    }
+
+def get_translation_cache_stats():
+    return translation_cache.stats()
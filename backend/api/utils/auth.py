@@ -2,7 +2,8 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 import sys
 import os
 from dotenv import load_dotenv
@@ -11,9 +12,12 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Correct the imports
-from database import get_db
+from database import get_async_db
 from auth.models import UserResponse, TokenData
-from auth.service import get_user_by_email
+from auth.cache import (
+    cache_verified_user, get_cached_user_by_email, get_verified_user, profile_version, token_key,
+)
+from utils.tracing import span
 
 load_dotenv()
 
@@ -21,17 +25,52 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# Claim holding the user's profile, so authenticated requests need no DB lookup
+PROFILE_CLAIM = "profile"
+# Claim holding the profile version the claims were taken from
+PROFILE_VERSION_CLAIM = "pv"
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(lambda: None), db: Session = Depends(get_db)):
+def create_user_access_token(user: UserResponse, expires_delta: Optional[timedelta] = None):
+    """
+    Create an access token that carries the user's profile claims
+    """
+    profile = user.model_dump(mode="json", exclude={"email"})
+    return create_access_token(
+        data={"sub": user.email, PROFILE_CLAIM: profile, PROFILE_VERSION_CLAIM: profile_version(user.email)},
+        expires_delta=expires_delta
+    )
+
+def user_from_claims(payload: dict) -> Optional[UserResponse]:
+    """
+    Build the user from the token's profile claims; None if the token has
+    none or the profile changed after the token was issued
+    """
+    profile = payload.get(PROFILE_CLAIM)
+    if not isinstance(profile, dict):
+        return None
+    version = payload.get(PROFILE_VERSION_CLAIM, 0)
+    if not isinstance(version, int) or version < profile_version(payload["sub"]):
+        return None
+    try:
+        return UserResponse(email=payload["sub"], **profile)
+    except (TypeError, ValidationError):
+        return None
+
+async def get_current_user(token: str = Depends(lambda: None), db: AsyncSession = Depends(get_async_db)):
+    with span("auth"):
+        return await _authenticate(token, db)
+
+async def _authenticate(token: str, db: AsyncSession):
     # If no token is provided, return a mock user for development
     if token is None:
         # Create a mock user for development purposes
@@ -50,11 +89,17 @@ def get_current_user(token: str = Depends(lambda: None), db: Session = Depends(g
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    # Check if token is a string before trying to decode
+    if not isinstance(token, str):
+        raise credentials_exception
+    
+    # Tokens seen recently were already verified
+    key = token_key(token)
+    user = get_verified_user(key)
+    if user is not None:
+        return user
+    
     try:
-        # Check if token is a string before trying to decode
-        if not isinstance(token, str):
-            raise credentials_exception
-            
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
@@ -62,7 +107,14 @@ def get_current_user(token: str = Depends(lambda: None), db: Session = Depends(g
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = get_user_by_email(db, email=token_data.email)
+    
+    # Tokens carrying profile claims need no lookup; older tokens fall back
+    # to the profile cache, so most requests skip the database entirely
+    user = user_from_claims(payload)
+    if user is None:
+        user = await get_cached_user_by_email(db, email=token_data.email)
     if user is None:
         raise credentials_exception
+    # Tokens without an expiry stay cached only for the cache's own TTL
+    cache_verified_user(key, user, payload.get("exp", float("inf")))
     return user
\ No newline at end of file
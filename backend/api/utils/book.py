@@ -0,0 +1,53 @@
+import os
+import re
+from typing import Dict, List
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Markdown sources of the book, served by the Docusaurus site
+BOOK_DOCS_DIR = os.path.normpath(os.getenv(
+    "BOOK_DOCS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 "..", "..", "frontend", "book-website", "docs")
+))
+
+CHAPTER_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+def list_chapters(docs_dir: str = BOOK_DOCS_DIR) -> List[str]:
+    """
+    Return the ids (file names without extension) of every chapter
+    """
+    if not os.path.isdir(docs_dir):
+        return []
+    return sorted(
+        os.path.splitext(name)[0]
+        for name in os.listdir(docs_dir)
+        if name.endswith((".md", ".mdx"))
+    )
+
+def chapter_path(chapter_id: str, docs_dir: str = BOOK_DOCS_DIR) -> str:
+    """
+    Resolve a chapter id to its Markdown file, or None if it doesn't exist
+    """
+    # Chapter ids come from clients, so never let them escape the docs dir
+    if not CHAPTER_ID_RE.match(chapter_id):
+        return None
+    for extension in (".md", ".mdx"):
+        path = os.path.join(docs_dir, chapter_id + extension)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def load_chapter(chapter_id: str, docs_dir: str = BOOK_DOCS_DIR) -> str:
+    """
+    Read a chapter's Markdown source, or None if it doesn't exist
+    """
+    path = chapter_path(chapter_id, docs_dir)
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def load_all_chapters(docs_dir: str = BOOK_DOCS_DIR) -> Dict[str, str]:
+    return {chapter_id: load_chapter(chapter_id, docs_dir) for chapter_id in list_chapters(docs_dir)}
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so trivially different copies hash to the same key:
+    Unicode NFC, unified line endings, collapsed runs of spaces/tabs and
+    trimmed leading/trailing whitespace.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return text.strip()
+
+def content_hash(text: str) -> str:
+    """
+    SHA-256 hex digest of the normalized text
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class LRUCache:
+    """
+    In-process least-recently-used cache bounded by entry count and,
+    optionally, by the total size of the stored values. With ``ttl`` set,
+    entries also expire that many seconds after being stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_size: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = len, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._expires: Dict[Hashable, float] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data and not self._expired(key)
+
+    def get(self, key, default=None):
+        if key in self._data and self._expired(key):
+            self._remove(key)
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        if key in self._data:
+            self._remove(key)
+        item_size = self.sizeof(value) if self.max_size is not None else 0
+        if self.max_size is not None and item_size > self.max_size:
+            # Never let a single oversized value flush the whole cache
+            return
+        self._data[key] = value
+        self._sizes[key] = item_size
+        self.size += item_size
+        if self.ttl is not None:
+            self._expires[key] = time.monotonic() + self.ttl
+        while len(self._data) > self.max_entries or (
+            self.max_size is not None and self.size > self.max_size
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        if key not in self._data:
+            return default
+        value = self._data[key]
+        self._remove(key)
+        return value
+
+    def clear(self):
+        self._data.clear()
+        self._sizes.clear()
+        self._expires.clear()
+        self.size = 0
+
+    def _expired(self, key) -> bool:
+        return key in self._expires and self._expires[key] <= time.monotonic()
+
+    def _remove(self, key):
+        del self._data[key]
+        self.size -= self._sizes.pop(key)
+        self._expires.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key so only one of them runs
+    the underlying coroutine; the others await its result.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]):
+        if key in self._inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
@@ -0,0 +1,39 @@
+import hashlib
+from fastapi import Request
+from fastapi.responses import Response
+
+def strong_etag(body: bytes) -> str:
+    """
+    Strong ETag derived from the exact response bytes
+    """
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def if_none_match(header: str, *etags: str) -> bool:
+    """
+    Whether an If-None-Match header value names any of the ETags
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return any(etag.removeprefix("W/") in candidates for etag in etags)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match already names this ETag
+    """
+    return if_none_match(request.headers.get("if-none-match"), etag)
+
+def conditional_response(request: Request, body: bytes, media_type: str, cache_control: str,
+                         etag: str = None, headers: dict = None) -> Response:
+    """
+    Send ``body`` with caching headers, or 304 Not Modified when the
+    client's cached copy is current
+    """
+    etag = etag or strong_etag(body)
+    response_headers = {"ETag": etag, "Cache-Control": cache_control, **(headers or {})}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(content=body, media_type=media_type, headers=response_headers)
@@ -0,0 +1,93 @@
+import re
+from typing import List, NamedTuple
+
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+HEADING_RE = re.compile(r"^( {0,3}#{1,6}\s+)(.*?)(\s*)$", re.DOTALL)
+MDX_RE = re.compile(r"^(import\s|export\s|<[A-Za-z/][^>]*>\s*$)")
+
+class MarkdownBlock(NamedTuple):
+    """
+    A contiguous slice of a Markdown document.
+
+    ``prefix + body + suffix`` reproduces the original text exactly;
+    only ``body`` of translatable blocks is meant to be rewritten.
+    """
+    kind: str  # frontmatter, code, mdx, blank, heading, paragraph
+    prefix: str
+    body: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.body + self.suffix
+
+    @property
+    def translatable(self) -> bool:
+        return self.kind in ("heading", "paragraph") and bool(self.body.strip())
+
+def _verbatim(kind: str, lines: List[str]) -> MarkdownBlock:
+    return MarkdownBlock(kind, "", "".join(lines), "")
+
+def _split_trailing_whitespace(text: str):
+    body = text.rstrip()
+    return body, text[len(body):]
+
+def split_markdown_blocks(text: str) -> List[MarkdownBlock]:
+    """
+    Split a Markdown/MDX document into heading, paragraph and verbatim blocks.
+
+    Code fences, front matter, MDX import/export lines and standalone JSX
+    tags are kept verbatim, and blank lines are preserved so that joining
+    the blocks' ``text`` reproduces the input byte for byte.
+    """
+    lines = text.splitlines(keepends=True)
+    blocks = []
+    i = 0
+
+    # YAML front matter is only recognised at the very start of the document
+    if lines and lines[0].strip() == "---":
+        for j in range(1, len(lines)):
+            if lines[j].strip() == "---":
+                blocks.append(_verbatim("frontmatter", lines[:j + 1]))
+                i = j + 1
+                break
+
+    while i < len(lines):
+        line = lines[i]
+        fence = FENCE_RE.match(line)
+
+        if fence:
+            marker = fence.group(1)
+            j = i + 1
+            while j < len(lines) and not lines[j].lstrip().startswith(marker):
+                j += 1
+            # An unterminated fence runs to the end of the document
+            j = min(j + 1, len(lines))
+            blocks.append(_verbatim("code", lines[i:j]))
+            i = j
+        elif not line.strip():
+            j = i
+            while j < len(lines) and not lines[j].strip():
+                j += 1
+            blocks.append(_verbatim("blank", lines[i:j]))
+            i = j
+        elif MDX_RE.match(line):
+            blocks.append(_verbatim("mdx", [line]))
+            i += 1
+        elif HEADING_RE.match(line):
+            prefix, body, suffix = HEADING_RE.match(line).groups()
+            blocks.append(MarkdownBlock("heading", prefix, body, suffix))
+            i += 1
+        else:
+            j = i
+            while (j < len(lines) and lines[j].strip() and not FENCE_RE.match(lines[j])
+                   and not HEADING_RE.match(lines[j]) and not MDX_RE.match(lines[j])):
+                j += 1
+            body, suffix = _split_trailing_whitespace("".join(lines[i:j]))
+            blocks.append(MarkdownBlock("paragraph", "", body, suffix))
+            i = j
+
+    return blocks
+
+def join_markdown_blocks(blocks: List[MarkdownBlock]) -> str:
+    return "".join(block.text for block in blocks)
@@ -0,0 +1,214 @@
+import gzip
+import os
+import sys
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Responses are then only gzip-compressed
+    brotli = None
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.http_cache import if_none_match, strong_etag
+from utils.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, registry
+from utils.tracing import start_trace
+
+load_dotenv()
+
+# Requests slower than this are logged with their per-stage timings
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 2000))
+
+# ETags, conditional GETs and compression for complete (non-streamed) responses
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+# Smaller bodies are sent uncompressed; larger ones are passed through untouched
+HTTP_COMPRESSION_MIN_BYTES = int(os.getenv("HTTP_COMPRESSION_MIN_BYTES", 1024))
+HTTP_CACHE_MAX_BODY_BYTES = int(os.getenv("HTTP_CACHE_MAX_BODY_BYTES", 10_000_000))
+
+GZIP_LEVEL = 6
+# Brotli's higher qualities compress better but cost far more CPU per response
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+# Cache-Control for GET routes that don't set their own: (path, policy, Vary headers)
+CACHE_POLICIES = (
+    ("/health", "no-cache", ()),
+    # Profiles change rarely, but each token sees its own
+    ("/api/auth/profile", "private, no-cache", ("Authorization",)),
+)
+
+HTTP_NOT_MODIFIED = registry.counter(
+    "http_not_modified_total", "GET requests answered with 304 Not Modified by the cache middleware")
+HTTP_RESPONSE_BYTES = registry.counter(
+    "http_response_body_bytes_total", "Response body bytes sent by the cache middleware", ("encoding",))
+
+class MetricsMiddleware:
+    """
+    Record per-route request metrics and trace each request's stages.
+
+    A plain ASGI middleware, so streamed responses pass through untouched.
+    Stage timings completed before the response starts are sent in a
+    Server-Timing header along with an X-Trace-Id.
+    """
+
+    def __init__(self, app, excluded_paths=("/metrics",)):
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        trace = start_trace()
+        status = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(raw=message.setdefault("headers", []))
+                headers["X-Trace-Id"] = trace.trace_id
+                server_timing = trace.server_timing()
+                if server_timing:
+                    headers["Server-Timing"] = server_timing
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; label by its
+            # template so path parameters don't explode the label space
+            route = scope.get("route")
+            route_label = getattr(route, "path", "unmatched")
+            duration = trace.elapsed
+            HTTP_REQUESTS.inc(method=scope["method"], route=route_label, status=status)
+            HTTP_REQUEST_DURATION.observe(duration, method=scope["method"], route=route_label)
+            if duration * 1000 >= SLOW_REQUEST_MS:
+                print(f"Slow request {scope['method']} {route_label} ({status}): {trace.summary()}")
+
+def accepted_encodings(header: str) -> set:
+    """
+    Content codings an Accept-Encoding header allows (q > 0)
+    """
+    encodings = set()
+    for item in (header or "").split(","):
+        name, _, params = item.partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    Distinct strong ETag for a compressed representation, e.g. "abc-gzip"
+    """
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+class HTTPCacheMiddleware:
+    """
+    Add validators, caching policy and compression to complete GET responses.
+
+    Responses with a known length are buffered, given a strong ETag (unless
+    the route set its own) and the route's Cache-Control policy, answered
+    with 304 when the client's If-None-Match still matches, and compressed
+    with brotli (when installed) or gzip. Streamed responses, such as
+    server-sent events, are passed through untouched.
+    """
+
+    def __init__(self, app, policies=CACHE_POLICIES, minimum_size: int = HTTP_COMPRESSION_MIN_BYTES,
+                 max_body_size: int = HTTP_CACHE_MAX_BODY_BYTES):
+        self.app = app
+        self.policies = policies
+        self.minimum_size = minimum_size
+        self.max_body_size = max_body_size
+
+    def policy_for(self, path: str):
+        for prefix, cache_control, vary in self.policies:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return cache_control, vary
+        return None
+
+    def choose_encoding(self, request_headers: Headers, response_headers: MutableHeaders, size: int):
+        content_type = response_headers.get("content-type", "")
+        if size < self.minimum_size or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return None
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+
+        async def send_buffered(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                length = headers.get("content-length")
+                # Only complete, successful, not yet encoded bodies are buffered
+                if (message["status"] == 200 and length is not None and int(length) <= self.max_body_size
+                        and "content-encoding" not in headers):
+                    start = message
+                    return
+            elif message["type"] == "http.response.body" and start is not None:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self.finish(scope, start, b"".join(chunks), send)
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_buffered)
+
+    async def finish(self, scope, start: dict, body: bytes, send):
+        request_headers = Headers(scope=scope)
+        headers = MutableHeaders(raw=start.setdefault("headers", []))
+        policy = self.policy_for(scope["path"])
+        if policy is not None:
+            cache_control, vary = policy
+            headers.setdefault("Cache-Control", cache_control)
+            for name in vary:
+                headers.add_vary_header(name)
+
+        etag = headers.get("etag") or strong_etag(body)
+        encoding = self.choose_encoding(request_headers, headers, len(body))
+        if headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            headers.add_vary_header("Accept-Encoding")
+        headers["ETag"] = encoded_etag(etag, encoding) if encoding else etag
+
+        # A client holding any representation of this body may reuse it
+        validators = (etag, encoded_etag(etag, "br"), encoded_etag(etag, "gzip"))
+        if if_none_match(request_headers.get("if-none-match"), *validators):
+            HTTP_NOT_MODIFIED.inc()
+            del headers["content-length"]
+            del headers["content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": start["headers"]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding == "br":
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+        HTTP_RESPONSE_BYTES.inc(len(body), encoding=encoding or "identity")
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
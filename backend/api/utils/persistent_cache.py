@@ -0,0 +1,134 @@
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import delete, func, select
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import AsyncSessionLocal
+from utils.cache import LRUCache, SingleFlight
+
+# Prune the persistent tier once every this many writes rather than on every insert
+PRUNE_INTERVAL = 100
+
+class TieredCache:
+    """
+    Two-tier cache: an in-process LRU in front of a persistent SQLAlchemy
+    table, with request coalescing for concurrent misses.
+
+    ``model`` must have a ``cache_key`` primary key and a ``last_accessed``
+    timestamp; the cached value lives in ``value_column``.
+    """
+
+    def __init__(self, model, value_column: str, max_entries: int, max_size: int,
+                 max_rows: int, persist: bool = True, name: str = "cache"):
+        self.model = model
+        self.value_column = value_column
+        self.memory = LRUCache(max_entries=max_entries, max_size=max_size)
+        self.max_rows = max_rows
+        self.persist = persist
+        self.name = name
+        self.flight = SingleFlight()
+        self.persistent_hits = 0
+        self.misses = 0
+        self._writes_since_prune = 0
+
+    async def get_or_compute(self, cache_key: str, fields: dict, compute, cacheable=None):
+        """
+        Return the cached value or call ``compute()`` (a coroutine function)
+        once per key, storing the result in both tiers along with ``fields``.
+        ``cacheable(result)`` may reject results that should not be stored.
+        """
+        cached = self.memory.get(cache_key)
+        if cached is not None:
+            return cached
+
+        async def load_or_compute():
+            stored = await self.load(cache_key)
+            if stored is not None:
+                return stored
+
+            self.misses += 1
+            result = await compute()
+            if cacheable is None or cacheable(result):
+                await self.store(cache_key, fields, result)
+            return result
+
+        return await self.flight.do(cache_key, load_or_compute)
+
+    async def load(self, cache_key: str):
+        """
+        Look a key up in the persistent tier, promoting hits into memory
+        """
+        if not self.persist:
+            return None
+        stored = await self._load(cache_key)
+        if stored is not None:
+            self.persistent_hits += 1
+            self.memory.set(cache_key, stored)
+        return stored
+
+    async def store(self, cache_key: str, fields: dict, value):
+        self.memory.set(cache_key, value)
+        if self.persist:
+            await self._store(cache_key, fields, value)
+
+    async def _load(self, cache_key: str):
+        async with AsyncSessionLocal() as db:
+            try:
+                entry = await db.get(self.model, cache_key)
+                if entry is None:
+                    return None
+                entry.last_accessed = datetime.utcnow()
+                await db.commit()
+                return getattr(entry, self.value_column)
+            except Exception as e:
+                # The persistent tier is best-effort; fall back to the upstream call
+                print(f"{self.name} lookup failed: {str(e)}")
+                return None
+
+    async def _store(self, cache_key: str, fields: dict, value):
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.merge(self.model(
+                    cache_key=cache_key,
+                    last_accessed=datetime.utcnow(),
+                    **{self.value_column: value},
+                    **fields
+                ))
+                await db.commit()
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= PRUNE_INTERVAL:
+                    self._writes_since_prune = 0
+                    await self._prune(db)
+            except Exception as e:
+                await db.rollback()
+                print(f"{self.name} write failed: {str(e)}")
+
+    async def _prune(self, db):
+        """
+        Evict the least recently accessed rows beyond max_rows
+        """
+        excess = await db.scalar(select(func.count()).select_from(self.model)) - self.max_rows
+        if excess <= 0:
+            return
+        stale_keys = (await db.scalars(
+            select(self.model.cache_key)
+            .order_by(self.model.last_accessed.asc())
+            .limit(excess)
+        )).all()
+        await db.execute(delete(self.model).where(self.model.cache_key.in_(stale_keys)))
+        await db.commit()
+
+    def stats(self) -> dict:
+        memory_stats = self.memory.stats()
+        lookups = memory_stats["hits"] + self.persistent_hits + self.misses
+        return {
+            "memory": memory_stats,
+            "hits": memory_stats["hits"] + self.persistent_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "coalesced": self.flight.coalesced,
+            "hit_rate": (memory_stats["hits"] + self.persistent_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,27 @@
+import json
+from typing import AsyncIterator
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Headers that stop proxies (e.g. nginx) from buffering the event stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+async def single_chunk(text: str):
+    """
+    Stream already-complete text (e.g. a cache hit) as one token
+    """
+    yield text
+
+async def sse_events(tokens: AsyncIterator[str]):
+    """
+    Wrap a stream of text tokens as server-sent events.
+
+    Each token is sent as a JSON-encoded ``data`` event so newlines inside
+    tokens survive framing, followed by a final ``[DONE]`` marker.
+    """
+    async for token in tokens:
+        yield f"data: {json.dumps({'token': token})}\n\n"
+    yield "data: [DONE]\n\n"
@@ -0,0 +1,64 @@
+from typing import List
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to character-based estimates
+    tiktoken = None
+
+# Average characters per token for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+# Tokenizer shared by gpt-3.5/gpt-4 and text-embedding-ada-002
+TOKENIZER_ENCODING = "cl100k_base"
+
+_encoding = None
+_encoding_unavailable = tiktoken is None
+
+def _get_encoding():
+    """
+    Load the tiktoken encoding once; returns None if it isn't available
+    (package missing or encoding file not downloadable)
+    """
+    global _encoding, _encoding_unavailable
+    if _encoding is None and not _encoding_unavailable:
+        try:
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating token counts: {str(e)}")
+            _encoding_unavailable = True
+    return _encoding
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token count estimate used for prompt budgeting
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def count_tokens(text: str) -> int:
+    """
+    Exact token count when tiktoken is available, otherwise an estimate
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    """
+    Token counts for many texts; tiktoken encodes the batch in parallel
+    native threads instead of one Python call per text
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return [estimate_tokens(text) for text in texts]
+    return [len(tokens) for tokens in encoding.encode_batch(texts, disallowed_special=())]
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trim text to roughly max_tokens, preferring to cut at a word boundary
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars]
@@ -0,0 +1,77 @@
+import contextvars
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import STAGE_DURATION
+
+class Trace:
+    """
+    Per-request timing of the stages a request went through.
+
+    Repeated stages (e.g. several DB queries) are accumulated into one
+    entry with a total duration and a count.
+    """
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.spans: Dict[str, list] = {}  # stage -> [total seconds, count]
+
+    def add(self, stage: str, duration: float):
+        span = self.spans.setdefault(stage, [0.0, 0])
+        span[0] += duration
+        span[1] += 1
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """
+        Render completed spans as a Server-Timing header value
+        """
+        return ", ".join(
+            f'{stage};dur={1000 * total:.1f};desc="{count}x"' if count > 1 else f"{stage};dur={1000 * total:.1f}"
+            for stage, (total, count) in self.spans.items()
+        )
+
+    def summary(self) -> str:
+        stages = " ".join(f"{stage}={1000 * total:.1f}ms" for stage, (total, _) in self.spans.items())
+        return f"trace={self.trace_id} total={1000 * self.elapsed:.1f}ms {stages}"
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+def start_trace(trace_id: Optional[str] = None) -> Trace:
+    trace = Trace(trace_id)
+    _current_trace.set(trace)
+    return trace
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+def record_stage(stage: str, duration: float):
+    """
+    Add a completed stage to the current request's trace and the stage histogram
+    """
+    STAGE_DURATION.observe(duration, stage=stage)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, duration)
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a block of code as a request stage; works in sync and async code
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)